@@ -0,0 +1,143 @@
+# analytics.py
+# Running totals behind both Analytics dashboards.
+#
+# The rollups are built once from the full frame when data_access loads it,
+# then adjusted row by row as expenses are added, edited or deleted, so a
+# dashboard render costs O(distinct keys) instead of a groupby over every row.
+import threading
+
+import pandas as pd
+
+DIMENSIONS = ("category", "location", "trip_name", "month")
+
+
+def _month_key(value):
+    ts = pd.to_datetime(value, errors="coerce")
+    if pd.isna(ts):
+        return None
+    return (ts.year, ts.month)
+
+
+def _clean_key(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _amount(value):
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if amount != amount else amount
+
+
+class Rollups:
+    """Sum and count of `amount` per category, location, trip and calendar month."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._memo = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.total = 0.0
+            self.count = 0
+            self.groups = {dim: {} for dim in DIMENSIONS}
+            self._memo.clear()
+
+    # ----- maintenance -----
+    def rebuild(self, df):
+        with self._lock:
+            self.reset()
+            if df is None or df.empty:
+                return
+            amount = pd.to_numeric(df['amount'], errors='coerce').fillna(0.0)
+            self.total = float(amount.sum())
+            self.count = len(df)
+            dates = pd.to_datetime(df['date'], errors='coerce')
+            keys = {
+                "category": df['category'].map(_clean_key),
+                "location": df['location'].map(_clean_key),
+                "trip_name": df['trip_name'].map(_clean_key),
+                "month": pd.Series(list(zip(dates.dt.year, dates.dt.month)), index=df.index).where(dates.notna()),
+            }
+            for dim, key in keys.items():
+                grouped = amount.groupby(key, dropna=True).agg(['sum', 'count'])
+                self.groups[dim] = {
+                    (tuple(int(p) for p in k) if dim == "month" else k): [float(s), int(c)]
+                    for k, s, c in zip(grouped.index, grouped['sum'], grouped['count'])
+                }
+
+    def _row_keys(self, row):
+        return {
+            "category": _clean_key(row.get('category')),
+            "location": _clean_key(row.get('location')),
+            "trip_name": _clean_key(row.get('trip_name')),
+            "month": _month_key(row.get('date')),
+        }
+
+    def _add_row(self, row, sign):
+        amount = _amount(row.get('amount')) * sign
+        self.total += amount
+        self.count += sign
+        for dim, key in self._row_keys(row).items():
+            if key is None:
+                continue
+            bucket = self.groups[dim].setdefault(key, [0.0, 0])
+            bucket[0] += amount
+            bucket[1] += sign
+            if bucket[1] <= 0:
+                del self.groups[dim][key]
+
+    def apply(self, old_row, new_row):
+        """Account for one change: add (old_row None), delete (new_row None) or edit."""
+        with self._lock:
+            if old_row is not None:
+                self._add_row(old_row, -1)
+            if new_row is not None:
+                self._add_row(new_row, 1)
+            self._memo.clear()
+
+    # ----- queries -----
+    def _memoized(self, key, build):
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = build()
+            return self._memo[key]
+
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def totals_by(self, dim):
+        """DataFrame of [dim, amount, count] sorted by amount, largest first."""
+        def build():
+            items = sorted(self.groups[dim].items(), key=lambda kv: kv[1][0], reverse=True)
+            return pd.DataFrame([(k, s, c) for k, (s, c) in items], columns=[dim, 'amount', 'count'])
+        return self._memoized(("totals", dim), build).copy()
+
+    def top(self, dim, n=5):
+        return self.totals_by(dim).head(n)
+
+    def top_key(self, dim, default="N/A"):
+        totals = self.totals_by(dim)
+        return totals[dim].iloc[0] if not totals.empty else default
+
+    def monthly(self):
+        """Chronological monthly totals, with empty months filled in as zero.
+
+        Columns: month (first day of the month), label ("%b %Y"), amount, count.
+        """
+        def build():
+            months = self.groups["month"]
+            if not months:
+                return pd.DataFrame(columns=['month', 'label', 'amount', 'count'])
+            first, last = min(months), max(months)
+            index = pd.period_range(pd.Period(year=first[0], month=first[1], freq='M'),
+                                    pd.Period(year=last[0], month=last[1], freq='M'), freq='M')
+            rows = [(p.to_timestamp(), p.strftime("%b %Y")) + tuple(months.get((p.year, p.month), (0.0, 0)))
+                    for p in index]
+            return pd.DataFrame(rows, columns=['month', 'label', 'amount', 'count'])
+        return self._memoized(("monthly",), build).copy()
@@ -1,6 +1,4 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 
 page_bg = """
 <style>
@@ -18,7 +16,7 @@ h1, h2, h3, h4, h5, h6 {
 """
 st.markdown(page_bg, unsafe_allow_html=True)
 
-from functions import add_expense, get_expenses, update_expense, delete_expense
+from data_access import add_expense, get_expenses, update_expense, delete_expense, get_rollups, get_view_frame
 
 st.set_page_config(page_title="Travel Expense Tracker", layout="wide")
 st.title("✈️ Travel Expense Tracker")
@@ -38,23 +36,25 @@ if choice == "Add Expense":
         submitted = st.form_submit_button("Add Expense")
         
         if submitted:
-            add_expense(date, category, amount, description, location)
+            add_expense(date, category, amount, location=location, description=description)
             st.success("Expense Added Successfully!")
 
 # ------------------ View Expenses ------------------
 elif choice == "Analytics":
     st.markdown("<h2 style='text-align:center;color:#00BFFF;'>🌍 Real-Time Travel Expense Analytics Dashboard</h2>", unsafe_allow_html=True)
-    df = get_expenses()
+    # chart libraries are only needed here, so they are imported on first visit
+    import plotly.express as px
+    from geocoding import attach_coordinates
+    from lod import chart_budget, cluster_points
 
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'])
-        df['month'] = df['date'].dt.strftime("%b %Y")
+    rollups = get_rollups()
 
+    if rollups.count:
         # ---- KPIs ----
-        total_expense = df['amount'].sum()
-        avg_expense = df['amount'].mean()
-        top_location = df.groupby('location')['amount'].sum().idxmax()
-        top_spent = df.groupby('category')['amount'].sum().idxmax()
+        total_expense = rollups.total
+        avg_expense = rollups.average()
+        top_location = rollups.top_key('location')
+        top_spent = rollups.top_key('category')
 
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -69,37 +69,26 @@ elif choice == "Analytics":
         st.markdown("---")
 
         # ---- Category Pie Chart ----
-        cat_fig = px.pie(df, names='category', values='amount', title="Expense Distribution by Category",
+        cat_df = rollups.totals_by('category')
+        cat_fig = px.pie(cat_df, names='category', values='amount', title="Expense Distribution by Category",
                          color_discrete_sequence=px.colors.qualitative.Bold)
-        cat_fig.update_traces(textinfo='percent+label', pull=[0.05]*len(df['category']))
+        cat_fig.update_traces(textinfo='percent+label', pull=[0.05]*len(cat_df))
         st.plotly_chart(cat_fig, use_container_width=True)
 
         # ---- Monthly Trend ----
-        monthly = df.groupby('month')['amount'].sum().reset_index()
+        monthly = rollups.monthly()
         line_fig = px.line(monthly, x='month', y='amount', markers=True,
                            title="📆 Monthly Expense Trend", color_discrete_sequence=['#00BFFF'])
         line_fig.update_traces(line=dict(width=3))
+        line_fig.update_xaxes(tickformat="%b %Y")
         st.plotly_chart(line_fig, use_container_width=True)
 
         # ---- Location-based Heatmap ----
         try:
-            from geopy.geocoders import Nominatim
-            geolocator = Nominatim(user_agent="travel_expense_app")
+            # cache-only lookup, one per distinct location; misses are geocoded in the background
+            df = attach_coordinates(get_view_frame())
 
-            def get_coordinates(loc):
-                try:
-                    location = geolocator.geocode(loc)
-                    if location:
-                        return pd.Series([location.latitude, location.longitude])
-                except:
-                    return pd.Series([None, None])
-                return pd.Series([None, None])
-
-            if 'latitude' not in df.columns or 'longitude' not in df.columns:
-                coords = df['location'].dropna().apply(get_coordinates)
-                df[['latitude', 'longitude']] = coords
-
-            map_data = df.dropna(subset=['latitude', 'longitude'])
+            map_data = cluster_points(df, chart_budget('analytics_map'))
 
             if not map_data.empty:
                 st.markdown("### 🗺️ Location Heatmap of Expenses")
@@ -110,7 +99,7 @@ elif choice == "Analytics":
                     size="amount",
                     color="category",
                     hover_name="location",
-                    hover_data=["amount", "description"],
+                    hover_data=["amount", "count", "description"],
                     zoom=3,
                     color_discrete_sequence=px.colors.qualitative.Prism
                 )
@@ -128,7 +117,7 @@ elif choice == "Analytics":
         st.markdown("---")
 
         # ---- Top Locations Chart ----
-        loc_sum = df.groupby('location')['amount'].sum().reset_index().sort_values(by='amount', ascending=False)
+        loc_sum = rollups.totals_by('location')
         bar_fig = px.bar(loc_sum, x='location', y='amount',
                          title="🏙️ Top Spending Locations",
                          color='amount', color_continuous_scale='tealgrn')
@@ -0,0 +1,97 @@
+# benchmarks/bench_import_time.py
+# Cold-start import cost of the app shell and of each page, via `python -X importtime`.
+#
+#   python benchmarks/bench_import_time.py            # report
+#   python benchmarks/bench_import_time.py --check    # fail on a regression
+#   python benchmarks/bench_import_time.py --update   # re-baseline import_budget.json
+#
+# --check fails if the shell imports one of the heavy libraries that pages are
+# supposed to load lazily (beyond what `import streamlit` already pulls in), or if any target exceeds its budget in
+# import_budget.json by more than --tolerance (timings are machine-dependent,
+# so re-baseline with --update on the machine that runs the check).
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+
+# what app.py needs before the selected page is imported
+SHELL = "import streamlit, screens, data_access"
+HEAVY_MODULES = ["plotly", "PIL", "geopy", "openpyxl", "gspread"]
+
+
+def targets():
+    from importlib import import_module
+    sys.path.insert(0, ROOT)
+    pages = import_module("screens").PAGES
+    return {"shell": SHELL, **{f"screens.{m}": f"import screens.{m}" for m in pages.values()}}
+
+
+def measure(statement, repeat=3):
+    """Best-of-repeat total import time (ms) and the top-level modules imported."""
+    best, modules = None, None
+    env = dict(os.environ, WANDERLOG_JOURNAL=os.path.join(tempfile.gettempdir(), "bench_import.journal"))
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                              cwd=ROOT, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"`{statement}` failed:\n{proc.stderr[-2000:]}")
+        total, found = 0, {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            total += int(self_us)
+            package = name.strip().split(".")[0]
+            found[package] = max(found.get(package, 0), int(cumulative_us))
+        if best is None or total < best:
+            best, modules = total, found
+    return best / 1000.0, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the app shell and pages.")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed multiple of the budget")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    budgets = {}
+    if os.path.exists(BUDGET_PATH):
+        with open(BUDGET_PATH) as f:
+            budgets = json.load(f)
+
+    failures, results = [], {}
+    print(f"{'target':<32} {'ms':>9} {'budget':>9}  heaviest imports")
+    for name, statement in targets().items():
+        ms, modules = measure(statement, args.repeat)
+        results[name] = round(ms, 1)
+        heaviest = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:4]
+        budget = budgets.get(name)
+        print(f"{name:<32} {ms:>9.1f} {budget if budget is not None else '-':>9}  "
+              + ", ".join(f"{m} {us / 1000:.0f}ms" for m, us in heaviest))
+        if name == "shell":
+            _, baseline = measure("import streamlit", 1)
+            leaked = [m for m in HEAVY_MODULES if m in modules and m not in baseline]
+            if leaked:
+                failures.append(f"app shell imports {', '.join(leaked)}; import them inside the page that needs them")
+        if budget is not None and ms > budget * args.tolerance:
+            failures.append(f"{name}: {ms:.0f}ms exceeds budget {budget}ms x{args.tolerance}")
+
+    if args.update:
+        with open(BUDGET_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"wrote {BUDGET_PATH}")
+    if args.check and failures:
+        print("\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
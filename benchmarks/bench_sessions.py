@@ -0,0 +1,104 @@
+# benchmarks/bench_sessions.py
+# Backend reads and memory as the number of concurrent sessions grows.
+#
+#   python benchmarks/bench_sessions.py                       # 100k rows, 1..64 sessions
+#   python benchmarks/bench_sessions.py --rows 20000 --sessions 1 8 32
+#
+# Each session is a thread doing what a page rerun does: read the expense
+# frame (and scribble on its copy, as import/export does), the view frame, a
+# query page and the rollups, plus an occasional versioned edit. With the
+# shared cache, backend reads should stay at one per data change and the
+# memory held per session should be a few KB regardless of table size.
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+os.environ.setdefault("WANDERLOG_WRITE_BEHIND", "0")
+os.environ.setdefault("WANDERLOG_GEOCODE_DB", os.path.join(tempfile.gettempdir(), "bench_sessions_geocode.db"))
+os.environ.setdefault("WANDERLOG_SEARCH_INDEX", "")
+
+import data_access  # noqa: E402
+from storage import set_backend  # noqa: E402
+from synthetic import OfflineSheetsBackend, generate_expenses  # noqa: E402
+
+
+class CountingBackend(OfflineSheetsBackend):
+    def __init__(self, df):
+        super().__init__(df)
+        self.loads = 0
+
+    def load_df(self):
+        self.loads += 1
+        return super().load_df()
+
+
+def run(backend, n_sessions, reruns, edit_every):
+    held = []           # what each session keeps alive until its rerun finishes
+    conflicts = [0]
+    barrier = threading.Barrier(n_sessions)
+
+    def session(i):
+        barrier.wait()
+        for r in range(reruns):
+            frame = data_access.get_expenses_df()
+            frame['amount'] = frame['amount'] * 1.0   # a private change must not leak into other sessions
+            view = data_access.get_view_frame()
+            page, _ = data_access.query_expenses(limit=50, categories=['Food'])
+            data_access.get_rollups()
+            if edit_every and (i * reruns + r) % edit_every == 0:
+                expense_id = int(view['id'].iloc[r % len(view)])
+                version = data_access.get_row_version(expense_id)
+                row = data_access.get_expense(expense_id)
+                try:
+                    data_access.update_expense(expense_id, row['date'], row['trip_name'], row['category'],
+                                               row['amount'] + 1, row['description'], row['location'], row['emoji'],
+                                               row['photo_path'] or None, expected_version=version)
+                except data_access.StaleEditError:
+                    conflicts[0] += 1
+            if r == reruns - 1:
+                held.append((frame, view, page))
+
+    loads_before = backend.loads
+    tracemalloc.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "backend_loads": backend.loads - loads_before, "held_mb": current / 1e6,
+            "peak_mb": peak / 1e6, "conflicts": conflicts[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend reads and memory per number of concurrent sessions.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--edit-every", type=int, default=7, help="every nth rerun saves an edit (0 = read only)")
+    args = parser.parse_args()
+
+    backend = CountingBackend(generate_expenses(args.rows, seed=0))
+    set_backend(backend)
+    data_access.refresh_expenses()
+    data_access.get_view_frame()   # warm the shared cache once, as the first visitor would
+    print(f"{'sessions':>8} {'seconds':>8} {'loads':>6} {'held MB':>8} {'peak MB':>8} {'conflicts':>9}")
+    for n in args.sessions:
+        r = run(backend, n, args.reruns, args.edit_every)
+        print(f"{n:>8} {r['seconds']:>8.2f} {r['backend_loads']:>6} {r['held_mb']:>8.1f} {r['peak_mb']:>8.1f} "
+              f"{r['conflicts']:>9}")
+
+
+if __name__ == "__main__":
+    main()
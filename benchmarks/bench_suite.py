@@ -0,0 +1,231 @@
+# benchmarks/bench_suite.py
+# End-to-end timings of the data path behind the pages, on synthetic data.
+#
+#   python benchmarks/bench_suite.py                          # 1k, 10k, 100k rows
+#   python benchmarks/bench_suite.py --sizes 1000000 --repeat 1
+#   python benchmarks/bench_suite.py --out before.json
+#   python benchmarks/bench_suite.py --compare before.json    # ratios against an earlier run
+#
+# Data comes from synthetic.generate_expenses and is served by
+# OfflineSheetsBackend (or a throwaway SQLite file with --backend sqlite), so
+# no network or credentials are needed. Stages:
+#   load.*    backend read, and a full data_access reload (conform + rollups)
+#   view.*    prepare_view_frame, one gallery page, one filtered query page
+#   agg.*     rollup/ledger rebuilds, dashboard queries, one incremental edit,
+#             and the plain groupbys the dashboards used to run per render
+#   search.*  search index build, save/load round trip, and typical queries
+#   figure.*  Plotly figure build time and serialized size for each chart
+# Results are written as JSON (default benchmarks/results/<git sha>.json).
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+# saves must go straight to the benchmark backend, not a journal in the repo
+os.environ.setdefault("WANDERLOG_WRITE_BEHIND", "0")
+os.environ.setdefault("WANDERLOG_JOURNAL", os.path.join(tempfile.gettempdir(), "bench_suite.journal"))
+os.environ.setdefault("WANDERLOG_GEOCODE_DB", os.path.join(tempfile.gettempdir(), "bench_suite_geocode.db"))
+# nor may synthetic rows end up in the app's search index or budgets file
+os.environ.setdefault("WANDERLOG_SEARCH_INDEX", "")
+os.environ.setdefault("WANDERLOG_BUDGETS", os.path.join(tempfile.gettempdir(), "bench_suite_budgets.json"))
+
+import pandas as pd  # noqa: E402
+
+import data_access  # noqa: E402
+from analytics import Rollups  # noqa: E402
+from budgets import TripLedger  # noqa: E402
+from lod import bucket_timeline, chart_budget, cluster_points  # noqa: E402
+from query import run_query  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from storage import SQLiteBackend, set_backend  # noqa: E402
+from synthetic import OfflineSheetsBackend, generate_expenses  # noqa: E402
+from views import prepare_view_frame  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def timed(fn, repeat):
+    """(best seconds, last result); slow stages (> 1s) run once."""
+    best, result = float("inf"), None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if elapsed > 1.0:
+            break
+    return best, result
+
+
+def figure_stats(fig):
+    points = 0
+    for trace in fig.data:
+        for attr in ("x", "lat", "values"):
+            values = getattr(trace, attr, None)
+            if values is not None:
+                points += len(values)
+                break
+    return {"bytes": len(fig.to_json()), "points": points}
+
+
+def make_backend(kind, df, workdir):
+    if kind == "sheets":
+        return OfflineSheetsBackend(df, upload_dir=os.path.join(workdir, "uploads"))
+    backend = SQLiteBackend(path=os.path.join(workdir, f"bench_{len(df)}.db"), upload_dir=os.path.join(workdir, "uploads"))
+    backend.add_many(df.drop(columns=['id']).to_dict('records'))
+    return backend
+
+
+def run_size(n, args, workdir):
+    from screens.analytics_dashboard import category_figure, locations_figure, monthly_figure
+    from screens.journey_timeline import memories_map, timeline_figure
+
+    results = {}
+
+    def record(stage, fn):
+        seconds, value = timed(fn, args.repeat)
+        results[stage] = {"seconds": round(seconds, 6)}
+        return value
+
+    df = generate_expenses(n, seed=args.seed, photo_share=args.photo_share,
+                           photo_dir=os.path.join(workdir, "photos") if args.photos else None)
+    backend = make_backend(args.backend, df, workdir)
+    set_backend(backend)
+
+    # ----- load -----
+    record("load.backend", backend.load_df)
+
+    def reload():
+        data_access.refresh_expenses()
+        return data_access.get_expenses_df()
+    frame = record("load.full_reload", reload)
+
+    # ----- view -----
+    view = record("view.prepare", lambda: prepare_view_frame(frame))
+    record("view.gallery_page", lambda: [(r['title'], r['label']) for r in view.iloc[:9].to_dict('records')])
+    record("view.query_page", lambda: run_query(view, sort_by='amount', limit=50, categories=['Food', 'Hotel'],
+                                                location='a', min_amount=100))
+
+    # ----- aggregation -----
+    rollups = Rollups()
+    record("agg.rollups_rebuild", lambda: rollups.rebuild(frame))
+    ledger = TripLedger()
+    record("agg.ledger_rebuild", lambda: ledger.rebuild(frame))
+
+    def dashboard_queries():
+        rollups._memo.clear()
+        return (rollups.totals_by('category'), rollups.top('location', 8), rollups.monthly(),
+                rollups.totals_by('trip_name'))
+    record("agg.dashboard_queries", dashboard_queries)
+
+    row = frame.iloc[len(frame) // 2].to_dict()
+    edited = dict(row, amount=row['amount'] + 1, category='Other')
+
+    def incremental_edit():
+        rollups.apply(row, edited)
+        ledger.apply(row, edited)
+        rollups.apply(edited, row)
+        ledger.apply(edited, row)
+    seconds, _ = timed(incremental_edit, max(args.repeat, 5))
+    results["agg.incremental_edit"] = {"seconds": round(seconds / 2, 6)}
+
+    def groupby_baseline():
+        amount = pd.to_numeric(frame['amount'], errors='coerce')
+        months = pd.to_datetime(frame['date'], errors='coerce').dt.to_period('M')
+        return (amount.groupby(frame['category']).sum(), amount.groupby(frame['location']).sum(),
+                amount.groupby(months).sum(), amount.groupby(frame['trip_name']).sum())
+    record("agg.groupby_baseline", groupby_baseline)
+
+    # ----- search -----
+    index = SearchIndex(path=None)  # no file yet, so every round really tokenizes the frame
+    record("search.build", lambda: (index.reset(), index.rebuild(frame)))
+    index.path = os.path.join(workdir, f"search_{n}.pkl")
+    record("search.save", lambda: (setattr(index, "_dirty", True), index.save()))
+    record("search.load", lambda: SearchIndex(path=index.path).rebuild(frame))
+    for name, text in [("exact", "dinner"), ("prefix", "bang"), ("typo", "mumbia"), ("two_words", "street food")]:
+        hits = record(f"search.query_{name}", lambda: index.search(text, limit=10))
+        results[f"search.query_{name}"]["hits"] = len(hits)
+
+    # ----- figures -----
+    def build(stage, make):
+        fig = record(stage, make)
+        results[stage].update(figure_stats(fig))
+
+    build("figure.timeline", lambda: timeline_figure(bucket_timeline(view.dropna(subset=['date']), chart_budget('timeline'))[0]))
+    center = {"lat": float(view['latitude'].mean()), "lon": float(view['longitude'].mean())}
+    build("figure.journey_map", lambda: memories_map(cluster_points(view, chart_budget('journey_map')), center, 2))
+    build("figure.category", lambda: category_figure(rollups.totals_by('category')))
+    build("figure.monthly", lambda: monthly_figure(rollups.monthly()))
+    build("figure.locations", lambda: locations_figure(rollups.top('location', 8)))
+    return results
+
+
+def git_sha():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(base, current):
+    print(f"\n{'rows':>8}  {'stage':<26} {'base (s)':>10} {'now (s)':>10} {'ratio':>7}")
+    for size, stages in current["results"].items():
+        for stage, now in stages.items():
+            before = base.get("results", {}).get(size, {}).get(stage)
+            if before and before["seconds"]:
+                print(f"{size:>8}  {stage:<26} {before['seconds']:>10.4f} {now['seconds']:>10.4f} "
+                      f"{now['seconds'] / before['seconds']:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading, view prep, aggregation and figures.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["sheets", "sqlite"], default="sheets")
+    parser.add_argument("--photo-share", type=float, default=0.05, help="share of rows with a photo_path")
+    parser.add_argument("--photos", action="store_true", help="also write the photo files (needs Pillow)")
+    parser.add_argument("--out", help="JSON output path (default benchmarks/results/<git sha>.json)")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    args = parser.parse_args()
+
+    sha = git_sha()
+    report = {
+        "meta": {
+            "commit": sha, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "backend": args.backend,
+            "seed": args.seed, "repeat": args.repeat, "python": platform.python_version(),
+            "pandas": pd.__version__, "machine": platform.machine(), "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    print(f"{'rows':>8}  {'stage':<26} {'seconds':>10}  extra")
+    with tempfile.TemporaryDirectory(prefix="wanderlog_bench_") as workdir:
+        for n in args.sizes:
+            results = run_size(n, args, workdir)
+            report["results"][str(n)] = results
+            for stage, r in results.items():
+                extra = ", ".join(f"{k}={v}" for k, v in r.items() if k != "seconds")
+                print(f"{n:>8}  {stage:<26} {r['seconds']:>10.4f}  {extra}")
+
+    out = args.out or os.path.join(HERE, "results", f"{sha}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
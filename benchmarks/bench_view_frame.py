@@ -0,0 +1,78 @@
+# benchmarks/bench_view_frame.py
+# Row-wise label/gallery code vs. views.prepare_view_frame on synthetic data.
+# "row-wise" is what the Journey Timeline used to do (apply(axis=1) labels,
+# iterrows over every gallery card); "vectorized" is prepare_view_frame plus
+# one gallery page of records.
+#
+#   python benchmarks/bench_view_frame.py [--sizes 1000 10000 100000]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from views import prepare_view_frame  # noqa: E402
+
+
+def synthetic_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    trips = np.array(["Mumbai Conference", "Kerala Trip", "Goa Weekend", ""])
+    locations = np.array(["Mumbai", "Kochi", "Panaji", "Delhi"])
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'date': (pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 1000, n), unit="D")).strftime("%Y-%m-%d"),
+        'trip_name': trips[rng.integers(0, len(trips), n)],
+        'category': np.array(["Flight", "Hotel", "Food", "Transport"])[rng.integers(0, 4, n)],
+        'amount': rng.uniform(50, 20000, n).round(2),
+        'location': locations[rng.integers(0, len(locations), n)],
+        'description': "memory",
+        'emoji': np.array(["✨", "🍛", "", "🏨"])[rng.integers(0, 4, n)],
+    })
+
+
+def old_path(df):
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values('date')
+    df['month'] = df['date'].dt.strftime("%b %Y")
+    df['label'] = df.apply(lambda r: f"{r.get('emoji','') or ''} {r.get('trip_name') or r.get('location','')} — ₹{r['amount']:.0f}", axis=1)
+    titles = []
+    for idx, row in df.iterrows():
+        titles.append(f"{row.get('emoji','')} {row.get('trip_name') or row.get('location','')}")
+    return df
+
+
+def new_path(df, per_page=9):
+    df = prepare_view_frame(df)
+    titles = [row['title'] for row in df.iloc[:per_page].to_dict('records')]
+    return df
+
+
+def best_of(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark timeline label construction.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'row-wise (s)':>12}  {'vectorized (s)':>14}  {'speedup':>7}")
+    for n in args.sizes:
+        df = synthetic_frame(n)
+        old = best_of(old_path, df, args.repeat)
+        new = best_of(new_path, df, args.repeat)
+        print(f"{n:>8}  {old:>12.4f}  {new:>14.4f}  {old / new:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# benchmarks/synthetic.py
+# Deterministic synthetic expenses and an offline stand-in for the Sheets store.
+#
+#   from synthetic import generate_expenses, OfflineSheetsBackend
+#   df = generate_expenses(100_000, seed=0)
+#   backend = OfflineSheetsBackend(df)           # behaves like SheetsBackend, no network
+#
+# The same (n, seed) always gives the same frame, so timings are comparable
+# across commits.
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import COLUMNS, SheetsBackend  # noqa: E402
+
+CITIES = [
+    ("Mumbai", 19.076, 72.8777), ("Delhi", 28.6139, 77.209), ("Bengaluru", 12.9716, 77.5946),
+    ("Kochi", 9.9312, 76.2673), ("Panaji", 15.4909, 73.8278), ("Jaipur", 26.9124, 75.7873),
+    ("Udaipur", 24.5854, 73.7125), ("Chennai", 13.0827, 80.2707), ("Kolkata", 22.5726, 88.3639),
+    ("Hyderabad", 17.385, 78.4867), ("Varanasi", 25.3176, 82.9739), ("Leh", 34.1526, 77.5771),
+    ("Shimla", 31.1048, 77.1734), ("Munnar", 10.0889, 77.0595), ("Rishikesh", 30.0869, 78.2676),
+    ("Pondicherry", 11.9416, 79.8083), ("Agra", 27.1767, 78.0081), ("Darjeeling", 27.041, 88.2663),
+    ("Dubai", 25.2048, 55.2708), ("Singapore", 1.3521, 103.8198), ("Bangkok", 13.7563, 100.5018),
+    ("Bali", -8.3405, 115.092), ("Kathmandu", 27.7172, 85.324), ("Colombo", 6.9271, 79.8612),
+    ("London", 51.5072, -0.1276), ("Paris", 48.8566, 2.3522), ("Rome", 41.9028, 12.4964),
+    ("Tokyo", 35.6762, 139.6503), ("New York", 40.7128, -74.006), ("Sydney", -33.8688, 151.2093),
+]
+CATEGORIES = ["Flight", "Hotel", "Food", "Transport", "Sightseeing", "Other"]
+CATEGORY_WEIGHTS = [0.05, 0.15, 0.4, 0.2, 0.12, 0.08]
+# median spend per category (INR), log-normally spread
+CATEGORY_MEDIANS = [9000, 4500, 450, 300, 800, 600]
+TRIP_KINDS = ["Trip", "Weekend", "Conference", "Getaway", "Trek", "Holiday"]
+EMOJIS = ["", "", "✨", "🍛", "🏨", "✈️", "🚕", "📸", "🏖️"]
+WORDS = ["sunset", "street food", "train ride", "museum", "beach", "market", "temple",
+         "late checkout", "taxi", "breakfast", "ferry", "hike", "souvenirs", "dinner"]
+
+
+def generate_expenses(n, seed=0, n_trips=None, no_trip_share=0.1, photo_share=0.0, photo_dir=None, n_photos=50):
+    """A frame with the storage.COLUMNS layout and n rows.
+
+    Trips visit a few nearby cities over 2-21 days; coordinates are the city
+    centre plus a little jitter. With photo_share > 0, that share of rows gets
+    a photo_path; the files themselves are only written when photo_dir is
+    given (n_photos distinct JPEGs shared round-robin, needs Pillow).
+    """
+    rng = np.random.default_rng(seed)
+    n_trips = n_trips or int(np.clip(n // 200, 5, 500))
+
+    city_names = np.array([c[0] for c in CITIES])
+    city_lat = np.array([c[1] for c in CITIES])
+    city_lon = np.array([c[2] for c in CITIES])
+
+    # trips: a home city, a start day and a length
+    trip_home = rng.integers(0, len(CITIES), n_trips)
+    trip_kind = rng.integers(0, len(TRIP_KINDS), n_trips)
+    trip_start = pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365, n_trips), unit="D")
+    trip_days = rng.integers(2, 22, n_trips)
+    trip_names = np.array([f"{city_names[h]} {TRIP_KINDS[k]} {i + 1}" for i, (h, k) in enumerate(zip(trip_home, trip_kind))])
+
+    trip = rng.integers(0, n_trips, n)
+    day = trip_start.values[trip] + (rng.random(n) * trip_days[trip]).astype("int64").astype("timedelta64[D]")
+    # most spend is in the trip's home city, the rest in a random one
+    city = np.where(rng.random(n) < 0.7, trip_home[trip], rng.integers(0, len(CITIES), n))
+    category = rng.choice(len(CATEGORIES), n, p=CATEGORY_WEIGHTS)
+    amount = np.round(np.array(CATEGORY_MEDIANS)[category] * rng.lognormal(0.0, 0.6, n), 2)
+    trip_name = trip_names[trip]
+    trip_name[rng.random(n) < no_trip_share] = ""
+
+    words = np.array(WORDS)
+    description = pd.Series(words[rng.integers(0, len(words), n)]) + " in " + pd.Series(city_names[city])
+
+    df = pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'date': pd.DatetimeIndex(day).strftime("%Y-%m-%d"),
+        'trip_name': trip_name,
+        'category': np.array(CATEGORIES)[category],
+        'amount': amount,
+        'location': city_names[city],
+        'description': description.values,
+        'emoji': np.array(EMOJIS)[rng.integers(0, len(EMOJIS), n)],
+        'photo_path': None,
+        'latitude': np.round(city_lat[city] + rng.normal(0, 0.05, n), 5),
+        'longitude': np.round(city_lon[city] + rng.normal(0, 0.05, n), 5),
+    }, columns=COLUMNS)
+
+    if photo_share > 0:
+        has_photo = rng.random(n) < photo_share
+        paths = np.array([f"photo_{i:04d}.jpg" for i in range(n_photos)], dtype=object)
+        if photo_dir is not None:
+            paths = np.array(write_photos(photo_dir, n_photos, seed), dtype=object)
+        df.loc[has_photo, 'photo_path'] = paths[np.arange(has_photo.sum()) % n_photos]
+    return df
+
+
+def write_photos(photo_dir, count, seed=0, size=(1600, 1200)):
+    """Write count camera-sized JPEGs (smooth gradients plus noise) and return their paths."""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise ImportError("Writing synthetic photos needs Pillow (pip install pillow)") from e
+    os.makedirs(photo_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    w, h = size
+    ys, xs = np.mgrid[0:h, 0:w]
+    paths = []
+    for i in range(count):
+        path = os.path.join(photo_dir, f"photo_{i:04d}.jpg")
+        if not os.path.exists(path):
+            base = rng.integers(0, 256, 3)
+            img = np.stack([(base[c] + xs * (c + 1) / 12 + ys / 9) % 256 for c in range(3)], axis=-1)
+            img = np.clip(img + rng.normal(0, 6, img.shape), 0, 255).astype("uint8")
+            Image.fromarray(img).save(path, quality=85)
+        paths.append(path)
+    return paths
+
+
+# ---------- Offline Sheets ----------
+class _SheetStandIn:
+    """The functions.py surface SheetsBackend uses, over an in-memory "sheet".
+
+    Cells are kept as strings and read back the way gspread's
+    get_all_records() does (numbers parsed per cell), so load cost is close to
+    the real thing minus the network. latency (seconds) is added to every call.
+    """
+    HEADER = COLUMNS
+
+    def __init__(self, df=None, latency=0.0, upload_dir="uploads"):
+        self.latency = latency
+        self.UPLOAD_DIR = upload_dir
+        self.rows = []
+        self.next_id = 1
+        if df is not None and not df.empty:
+            cells = df.reindex(columns=self.HEADER).astype(object).where(df.reindex(columns=self.HEADER).notna(), "")
+            self.rows = [[str(v) for v in row] for row in cells.itertuples(index=False, name=None)]
+            self.next_id = int(pd.to_numeric(df['id']).max()) + 1
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _value(cell):
+        if cell == "":
+            return ""
+        try:
+            return int(cell)
+        except ValueError:
+            try:
+                return float(cell)
+            except ValueError:
+                return cell
+
+    def get_all_records(self):
+        self._wait()
+        value = self._value
+        return [dict(zip(self.HEADER, (value(c) for c in row))) for row in self.rows]
+
+    def get_expenses_df(self):
+        return pd.DataFrame(self.get_all_records(), columns=self.HEADER)
+
+    def _append(self, record):
+        row = dict(record, id=self.next_id)
+        self.next_id += 1
+        self.rows.append(["" if row.get(col) is None else str(row.get(col)) for col in self.HEADER])
+        return row['id']
+
+    def add_expense(self, date, category, amount, location, description, emoji=""):
+        self._wait()
+        return self._append({'date': date, 'category': category, 'amount': amount,
+                             'location': location, 'description': description, 'emoji': emoji})
+
+    def add_expenses_bulk(self, records):
+        self._wait()
+        for record in records:
+            self._append(record)
+
+    def _find(self, expense_id):
+        key = str(expense_id)
+        for i, row in enumerate(self.rows):
+            if row[0] == key:
+                return i
+        return None
+
+    def update_expense(self, expense_id, date, trip_name, category, amount, description, location, emoji,
+                       keep_photo=None, new_photo=None):
+        self._wait()
+        i = self._find(expense_id)
+        if i is not None:
+            row = dict(zip(self.HEADER, self.rows[i]))
+            row.update(date=str(date), trip_name=trip_name, category=category, amount=str(amount),
+                       description=description, location=location, emoji=emoji, photo_path=keep_photo or "")
+            self.rows[i] = [str(row[col]) if row[col] is not None else "" for col in self.HEADER]
+
+    def delete_expense(self, expense_id):
+        self._wait()
+        i = self._find(expense_id)
+        if i is not None:
+            del self.rows[i]
+
+
+class OfflineSheetsBackend(SheetsBackend):
+    """SheetsBackend running against an in-memory sheet instead of gspread."""
+
+    def __init__(self, df=None, latency=0.0, upload_dir="uploads"):
+        self.functions = _SheetStandIn(df, latency=latency, upload_dir=upload_dir)
+        self.upload_dir = upload_dir
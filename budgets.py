@@ -0,0 +1,268 @@
+# budgets.py
+# Per-trip budgets, running spend and overspend alerts.
+#
+# Budgets (a total and/or per-category limits, optionally with trip start and
+# end dates) are kept in a small JSON file next to the app. Spend per trip is
+# maintained by TripLedger, a data_access cache observer: it is built once from
+# the full frame and then adjusted row by row on every add, edit and delete, so
+# burn rate and projections never rescan the expense table.
+import json
+import os
+import threading
+from datetime import date
+
+import pandas as pd
+
+BUDGETS_PATH = os.environ.get("WANDERLOG_BUDGETS", "budgets.json")
+WARN_AT = 0.9  # share of a budget spent before a trip is flagged
+
+STATUS_ORDER = {"over": 0, "projected_over": 1, "near": 2, "ok": 3}
+
+
+def _trip_key(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _category_key(value):
+    """Bucket name for a category; None, NaN and blanks all become ''."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value).strip()
+
+
+def _day_key(value):
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10])  # the usual shape; skips the pandas parser
+        except ValueError:
+            pass
+    ts = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(ts) else ts.date()
+
+
+def _amount(value):
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if amount != amount else amount
+
+
+def _parse_day(value):
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    return _day_key(value)
+
+
+# ---------- Budget definitions ----------
+class BudgetStore:
+    """Trip budgets persisted as JSON: {trip: {total, categories, start, end}}."""
+
+    def __init__(self, path=BUDGETS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._budgets = None
+
+    def _load(self):
+        if self._budgets is None:
+            self._budgets = {}
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    self._budgets = json.load(f)
+        return self._budgets
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._budgets, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def all(self):
+        with self._lock:
+            return {trip: dict(b) for trip, b in self._load().items()}
+
+    def get(self, trip):
+        with self._lock:
+            budget = self._load().get(trip)
+            return dict(budget) if budget else None
+
+    def set(self, trip, total=None, categories=None, start=None, end=None):
+        """Create or replace the budget for one trip. Amounts of 0/None mean no limit."""
+        categories = {c: float(v) for c, v in (categories or {}).items() if v}
+        budget = {
+            'total': float(total) if total else None,
+            'categories': categories,
+            'start': str(start) if start else None,
+            'end': str(end) if end else None,
+        }
+        with self._lock:
+            self._load()[trip] = budget
+            self._save()
+        return budget
+
+    def remove(self, trip):
+        with self._lock:
+            if self._load().pop(trip, None) is not None:
+                self._save()
+
+
+# ---------- Running spend ----------
+class TripLedger:
+    """Spend per trip, per trip and category, and per trip and day."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.trips = {}        # trip -> [amount, count]
+            self.categories = {}   # trip -> {category: [amount, count]}
+            self.days = {}         # trip -> {date: count}, for first/last day of spend
+
+    # ----- maintenance -----
+    def rebuild(self, df):
+        with self._lock:
+            self.reset()
+            if df is None or df.empty:
+                return
+            trip = df['trip_name'].map(_trip_key)
+            keep = trip.notna()
+            if not keep.any():
+                return
+            trip = trip[keep]
+            amount = pd.to_numeric(df.loc[keep, 'amount'], errors='coerce').fillna(0.0)
+            category = df.loc[keep, 'category'].map(_category_key)
+            day = pd.to_datetime(df.loc[keep, 'date'], errors='coerce').dt.normalize()
+
+            totals = amount.groupby(trip).agg(['sum', 'count'])
+            self.trips = {t: [float(s), int(c)] for t, s, c in zip(totals.index, totals['sum'], totals['count'])}
+            by_cat = amount.groupby([trip, category]).agg(['sum', 'count'])
+            for (t, c), s, n in zip(by_cat.index, by_cat['sum'], by_cat['count']):
+                self.categories.setdefault(t, {})[c] = [float(s), int(n)]
+            by_day = day.groupby([trip, day], dropna=True).size()
+            for (t, d), n in by_day.items():
+                self.days.setdefault(t, {})[d.date()] = int(n)
+
+    def _add_row(self, row, sign):
+        trip = _trip_key(row.get('trip_name'))
+        if trip is None:
+            return
+        amount = _amount(row.get('amount')) * sign
+        bucket = self.trips.setdefault(trip, [0.0, 0])
+        bucket[0] += amount
+        bucket[1] += sign
+        category = _category_key(row.get('category'))
+        cats = self.categories.setdefault(trip, {})
+        cat = cats.setdefault(category, [0.0, 0])
+        cat[0] += amount
+        cat[1] += sign
+        if cat[1] <= 0:
+            del cats[category]
+        day = _day_key(row.get('date'))
+        if day is not None:
+            days = self.days.setdefault(trip, {})
+            days[day] = days.get(day, 0) + sign
+            if days[day] <= 0:
+                del days[day]
+        if bucket[1] <= 0:
+            del self.trips[trip]
+            self.categories.pop(trip, None)
+            self.days.pop(trip, None)
+
+    def apply(self, old_row, new_row):
+        with self._lock:
+            if old_row is not None:
+                self._add_row(old_row, -1)
+            if new_row is not None:
+                self._add_row(new_row, 1)
+
+    # ----- queries -----
+    def spent(self, trip):
+        with self._lock:
+            return self.trips.get(trip, [0.0, 0])[0]
+
+    def span(self, trip):
+        """(first, last) day with spend on the trip, or (None, None)."""
+        with self._lock:
+            days = self.days.get(trip)
+            return (min(days), max(days)) if days else (None, None)
+
+    def category_spend(self, trip):
+        with self._lock:
+            return {c: s for c, (s, _) in self.categories.get(trip, {}).items()}
+
+
+def trip_status(ledger, trip, budget=None):
+    """Spend, burn rate and projection for one trip as a dict.
+
+    The burn rate is spend per day from the trip start (budget start, else the
+    first expense) to the latest expense; with a budget end date the projection
+    extends that rate over the remaining days.
+    """
+    budget = budget or {}
+    spent = ledger.spent(trip)
+    first, last = ledger.span(trip)
+    start = _parse_day(budget.get('start')) or first
+    end = _parse_day(budget.get('end'))
+    as_of = last or start
+    if end is not None and as_of is not None:
+        as_of = min(as_of, end)
+    days_elapsed = (as_of - start).days + 1 if start and as_of and as_of >= start else 1
+    burn = spent / days_elapsed
+    remaining = max(0, (end - as_of).days) if end and as_of else 0
+    projected = spent + burn * remaining
+    total = budget.get('total')
+
+    status = "ok"
+    if total:
+        if spent > total:
+            status = "over"
+        elif projected > total:
+            status = "projected_over"
+        elif spent >= WARN_AT * total:
+            status = "near"
+    over_categories = []
+    limits = budget.get('categories') or {}
+    if limits:
+        spend = ledger.category_spend(trip)
+        over_categories = [(c, spend.get(c, 0.0), limit) for c, limit in limits.items() if spend.get(c, 0.0) > limit]
+        if over_categories and status != "over":
+            status = "over"
+    return {
+        'trip': trip, 'spent': spent, 'budget': total, 'start': start, 'end': end,
+        'days': days_elapsed, 'burn_rate': burn, 'projected': projected,
+        'remaining': (total - spent) if total else None,
+        'status': status, 'over_categories': over_categories,
+    }
+
+
+def budget_report(ledger, budgets):
+    """trip_status for every budgeted trip, worst first."""
+    rows = [trip_status(ledger, trip, budget) for trip, budget in budgets.items()]
+    rows.sort(key=lambda r: (STATUS_ORDER[r['status']], -(r['spent'] / r['budget'] if r['budget'] else 0)))
+    return rows
+
+
+def alert_messages(report):
+    """(level, text) pairs for trips that are over or heading over budget."""
+    alerts = []
+    for r in report:
+        if r['status'] == "ok":
+            continue
+        if r['budget'] and r['spent'] > r['budget']:
+            alerts.append(("error", f"{r['trip']}: spent ₹{r['spent']:,.0f} of ₹{r['budget']:,.0f} "
+                                    f"(₹{r['spent'] - r['budget']:,.0f} over)"))
+        elif r['status'] == "projected_over":
+            alerts.append(("warning", f"{r['trip']}: at ₹{r['burn_rate']:,.0f}/day, projected ₹{r['projected']:,.0f} "
+                                      f"against a ₹{r['budget']:,.0f} budget"))
+        elif r['status'] == "near":
+            alerts.append(("warning", f"{r['trip']}: {r['spent'] / r['budget']:.0%} of the ₹{r['budget']:,.0f} budget spent"))
+        for category, spent, limit in r['over_categories']:
+            alerts.append(("error", f"{r['trip']} · {category}: spent ₹{spent:,.0f} of ₹{limit:,.0f}"))
+    return alerts
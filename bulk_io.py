@@ -0,0 +1,176 @@
+# bulk_io.py
+# Bulk CSV/XLSX import and CSV export of expenses.
+#
+# Imports are read in chunks, validated column-wise with the same rules as
+# the Add Expense form, and written with one add_expenses_bulk call per chunk.
+# Rows that fail validation are reported with their line number and skipped.
+# Blank rows are skipped without an error; every chunk is indexed by the
+# line (sheet row) each of its rows came from, so skipping one never shifts
+# the line numbers reported after it.
+import io
+import os
+
+import pandas as pd
+
+from query import filter_mask
+from validation import validate_frame
+
+CHUNK_SIZE = 2000
+EXPORT_COLUMNS = ['id', 'date', 'trip_name', 'category', 'amount', 'location',
+                  'description', 'emoji', 'latitude', 'longitude']
+
+# header spellings seen in card-statement exports
+COLUMN_ALIASES = {
+    'trip': 'trip_name', 'trip name': 'trip_name',
+    'city': 'location', 'place': 'location',
+    'memo': 'description', 'details': 'description', 'note': 'description', 'notes': 'description',
+    'value': 'amount', 'cost': 'amount', 'amount (inr)': 'amount',
+    'transaction date': 'date', 'day': 'date',
+}
+
+
+class ImportReport:
+    """Outcome of one import: counts plus (line, messages) for every rejected row."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.valid = 0
+        self.imported = 0
+        self.chunks = 0
+        self.errors = []
+
+    def errors_frame(self):
+        return pd.DataFrame([(line, "; ".join(msgs)) for line, msgs in self.errors], columns=['line', 'errors'])
+
+    def summary(self):
+        verb = "would import" if self.dry_run else "imported"
+        return f"{self.rows} rows read, {self.valid} valid, {verb} {self.valid if self.dry_run else self.imported}, {len(self.errors)} rejected"
+
+
+def _normalize_columns(df):
+    names = [str(c).strip().lower() for c in df.columns]
+    return df.set_axis([COLUMN_ALIASES.get(n, n.replace(' ', '_')) for n in names], axis=1)
+
+
+def _csv_chunks(source, chunksize):
+    # blank lines are kept by the parser so its running row index stays in step with the file
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False,
+                             skipinitialspace=True, skip_blank_lines=False):
+        chunk.index = chunk.index + 2  # line 1 is the header
+        yield chunk[(chunk != '').any(axis=1)]
+
+
+def _xlsx_chunks(source, chunksize):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError("Reading .xlsx files needs openpyxl (pip install openpyxl)") from e
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else f"column_{i}" for i, h in enumerate(header)]
+        batch, numbers = [], []
+        for number, row in enumerate(rows, start=2):  # row 1 is the header
+            if not any(v is not None for v in row):
+                continue
+            batch.append(row)
+            numbers.append(number)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header, index=numbers)
+                batch, numbers = [], []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, index=numbers)
+    finally:
+        wb.close()
+
+
+def read_chunks(source, filename=None, chunksize=CHUNK_SIZE):
+    """Yield DataFrame chunks from a CSV or XLSX path or file-like object, indexed by source line."""
+    name = (filename or getattr(source, "name", None) or str(source)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        yield from _xlsx_chunks(source, chunksize)
+    else:
+        yield from _csv_chunks(source, chunksize)
+
+
+def import_expenses(source, filename=None, dry_run=False, chunksize=CHUNK_SIZE, writer=None, progress=None):
+    """Validate and save every row in source; returns an ImportReport.
+
+    writer defaults to data_access.add_expenses_bulk; progress(report) is
+    called after each chunk.
+    """
+    if writer is None and not dry_run:
+        from data_access import add_expenses_bulk
+        writer = add_expenses_bulk
+    report = ImportReport(dry_run=dry_run)
+    for chunk in read_chunks(source, filename, chunksize):
+        chunk = _normalize_columns(chunk)
+        clean, errors = validate_frame(chunk)
+        bad = errors.str.len() > 0
+        report.errors.extend((int(line), errors.at[line]) for line in errors.index[bad])
+        good = clean[~bad]
+        report.rows += len(chunk)
+        report.valid += len(good)
+        report.chunks += 1
+        if not dry_run and not good.empty:
+            writer(good.to_dict('records'))
+            report.imported += len(good)
+        if progress:
+            progress(report)
+    return report
+
+
+# ---------- Export ----------
+def filter_expenses(df, start=None, end=None, trips=None, categories=None):
+    return df[filter_mask(df, start=start, end=end, trips=trips, categories=categories)]
+
+
+def iter_csv(df, chunksize=CHUNK_SIZE, columns=EXPORT_COLUMNS):
+    """Yield the frame as CSV text, one chunk of rows at a time (header first)."""
+    columns = [c for c in columns if c in df.columns]
+    for start in range(0, max(len(df), 1), chunksize):
+        buf = io.StringIO()
+        df.iloc[start:start + chunksize].to_csv(buf, columns=columns, index=False, header=(start == 0))
+        yield buf.getvalue()
+
+
+def export_csv(df, target, chunksize=CHUNK_SIZE):
+    """Write df to a path or text file object chunk by chunk; returns the row count."""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", newline="", encoding="utf-8") as f:
+            return export_csv(df, f, chunksize)
+    for text in iter_csv(df, chunksize):
+        target.write(text)
+    return len(df)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk import/export of expenses.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="import a CSV or XLSX file")
+    imp.add_argument("path")
+    imp.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    imp.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    exp = sub.add_parser("export", help="export expenses to CSV")
+    exp.add_argument("path")
+    exp.add_argument("--start")
+    exp.add_argument("--end")
+    exp.add_argument("--trip", action="append")
+    exp.add_argument("--category", action="append")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        report = import_expenses(args.path, dry_run=args.dry_run, chunksize=args.chunksize)
+        for line, messages in report.errors[:50]:
+            print(f"line {line}: {'; '.join(messages)}")
+        print(report.summary())
+    else:
+        from data_access import get_expenses_df
+        df = filter_expenses(get_expenses_df(), args.start, args.end, args.trip, args.category)
+        print(f"exported {export_csv(df, args.path)} rows to {args.path}")
@@ -0,0 +1,632 @@
+# data_access.py
+# Cached access to the expense table for the Streamlit pages.
+# The table itself lives in whichever storage backend storage.py selects.
+#
+# Streamlit re-runs the page script on every widget interaction, but modules
+# stay imported, so the frame loaded here survives reruns for the life of the
+# process. Mutations made through this module bump a version counter and are
+# replayed onto the cached frame on the next read instead of re-reading the
+# whole store; `refresh_expenses()` (the View Expenses Refresh button) forces
+# a full reload.
+#
+# With write-behind enabled (WANDERLOG_WRITE_BEHIND, on by default) saves are
+# journaled and applied to the cached frame immediately, and write_behind.py
+# pushes them to the backend in the background. New rows carry a temporary
+# negative id until the backend assigns theirs.
+#
+# Every Streamlit session in the process shares one ExpenseCache: the table is
+# read from the store once, sessions get copy-on-write views of it (pandas
+# only copies a column when someone writes to it), and frames derived from it
+# (the view frame, query pages) live in one size-bounded LRU. Each row has a
+# version that changes whenever the row does; passing expected_version to
+# update_expense/delete_expense turns a write against an outdated copy of the
+# row into a StaleEditError instead of a silent overwrite.
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+from analytics import Rollups
+from budgets import BudgetStore, TripLedger, budget_report
+from geocoding import lookup_coordinates, warm_cache_async
+from instrumentation import span, traced
+from media import get_store
+from storage import COLUMNS, empty_frame, get_backend
+from thumbnails import schedule_thumbnail
+from query import run_query
+from search import SearchIndex
+from views import prepare_view_frame
+from write_behind import UnresolvedIdError, WriteBehindQueue  # noqa: F401 (UnresolvedIdError is for the pages)
+
+WRITE_BEHIND = os.environ.get("WANDERLOG_WRITE_BEHIND", "1") != "0"
+DERIVED_CACHE_MB = float(os.environ.get("WANDERLOG_DERIVED_CACHE_MB", "256"))
+# Refresh clicks within this many seconds of the last full load reuse it
+REFRESH_MIN_AGE = float(os.environ.get("WANDERLOG_REFRESH_MIN_AGE", "5"))
+
+
+def _copy_on_write():
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except (KeyError, pd.errors.OptionError):
+        return False
+
+
+# With copy-on-write a shallow copy is a private, isolated view that costs no
+# row data; without it callers need a real copy to be safe to modify.
+COPY_ON_WRITE = _copy_on_write()
+
+
+class StaleEditError(Exception):
+    """The row changed since the caller read it (or no longer exists)."""
+
+    def __init__(self, expense_id, expected, current):
+        self.expense_id, self.expected, self.current = expense_id, expected, current
+        what = "was deleted" if current is None else f"is now at version {current}"
+        super().__init__(f"Expense {expense_id} changed since it was loaded (version {expected}; it {what})")
+
+
+def _frame_bytes(value):
+    if isinstance(value, tuple):
+        return sum(_frame_bytes(v) for v in value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    return 64
+
+
+class DerivedCache:
+    """Size-bounded LRU of values computed from one cache version (view frame, query pages).
+
+    Entries from an older version can never be hit again, so they are dropped
+    as soon as the version moves on; within a version the least recently used
+    entries go first once the total passes max_bytes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (value, bytes)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, version, key, build):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            self.stats["misses"] += 1
+        value = build()
+        size = _frame_bytes(value)
+        with self._lock:
+            if version != self._version or size > self.max_bytes:
+                return value
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.stats["evictions"] += 1
+        return value
+
+    def snapshot_stats(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+
+
+class ExpenseCache:
+    """Process-wide cached DataFrame of expenses plus the changes not yet applied to it."""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.version = 0            # bumped by every mutation
+        self._frame = None
+        self._frame_version = -1    # version the cached frame reflects
+        self._pending = []          # (version, op, payload) not yet applied
+        self._stale = True
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "full_loads": 0, "applied_changes": 0, "stale_edits": 0}
+        self._last_full_load = 0.0
+        self.derived = DerivedCache(int(DERIVED_CACHE_MB * 1e6))
+        self._row_versions = {}     # id -> version; rows never changed are at 0
+        self._id_index = None       # id -> row position in _frame, rebuilt once per version
+        self._id_index_version = -1
+        # derived structures kept in step with the frame: rebuild(df) on a full
+        # load, apply(old_row, new_row) for each change, and optionally
+        # reassign(id_map) when temporary ids are replaced
+        self.observers = []
+
+    # ----- reads -----
+    def sync(self):
+        """Bring the cached frame (and observers) up to date with every recorded change."""
+        with self._lock:
+            if self._stale or self._frame is None:
+                self.stats["misses"] += 1
+                self._full_load()
+            else:
+                self.stats["hits"] += 1
+                if self._pending:
+                    self._apply_pending()
+
+    def frame(self):
+        """The current expense frame. Callers get their own copy and may modify it."""
+        with self._lock:
+            self.sync()
+            return self._frame.copy(deep=not COPY_ON_WRITE)
+
+    def view_frame(self):
+        """prepare_view_frame() of the current data, computed once per version."""
+        with self._lock:
+            self.sync()
+            frame = self._frame
+
+            def build():
+                with span("cache.view_frame", rows=len(frame)):
+                    return prepare_view_frame(frame)
+            return _share(self.derived.get(self.version, "view", build))
+
+    def derive(self, key, build):
+        """build(view_frame) for the current version, shared by every session until the data changes."""
+        with self._lock:
+            view, version = self.view_frame(), self.version
+        # built outside the cache lock so sessions running different queries do not queue
+        return _share(self.derived.get(version, key, lambda: build(view)))
+
+    def row_version(self, expense_id):
+        """The row's current version, or None if there is no such row."""
+        with self._lock:
+            if self.get_row(expense_id) is None:
+                return None
+            return self._row_versions.get(int(expense_id), 0)
+
+    def check_version(self, expense_id, expected):
+        """Raise StaleEditError unless the row is still at the expected version."""
+        with self._lock:
+            current = self.row_version(expense_id)
+            if current != expected:
+                self.stats["stale_edits"] += 1
+                raise StaleEditError(expense_id, expected, current)
+
+    def get_row(self, expense_id):
+        """One expense as a dict, or None if there is no such id."""
+        with self._lock:
+            self.sync()
+            if self._id_index is None or self._id_index_version != self.version:
+                ids = self._frame['id']
+                self._id_index = dict(zip(ids[ids.notna()].astype(int), ids.index[ids.notna()]))
+                self._id_index_version = self.version
+            try:
+                pos = self._id_index.get(int(expense_id))
+            except (TypeError, ValueError):
+                return None
+            return self._frame.loc[pos].to_dict() if pos is not None else None
+
+    @traced("cache.full_load")
+    def _full_load(self):
+        df = self.loader()
+        if df is None:
+            df = empty_frame()
+        previous, self._frame = self._frame, _conform(df)
+        if previous is not None:
+            self._bump_changed_rows(previous, self._frame)
+        self._last_full_load = time.monotonic()
+        self._pending.clear()
+        self._frame_version = self.version
+        self._stale = False
+        self.stats["full_loads"] += 1
+        for observer in self.observers:
+            observer.rebuild(self._frame)
+
+    def _bump_changed_rows(self, previous, current):
+        """After a reload, give rows that differ from the previous frame (edited elsewhere) a new version."""
+        def hashed(df):
+            df = df.dropna(subset=['id']).drop_duplicates(subset=['id'], keep='last')
+            # compare values as text so dtype drift from in-place edits (float vs object) is not a change
+            cells = df[COLUMNS].astype(object)
+            for col in ('amount', 'latitude', 'longitude'):
+                cells[col] = pd.to_numeric(cells[col], errors='coerce').astype(object)
+            cells = cells.where(cells.notna(), "").astype(str)
+            return pd.Series(pd.util.hash_pandas_object(cells, index=False).values,
+                             index=df['id'].astype('int64').values)
+        before, after = hashed(previous), hashed(current)
+        common = before.index.intersection(after.index)
+        changed = common[before.loc[common].values != after.loc[common].values]
+        gone = before.index.difference(after.index)
+        for expense_id in [*changed, *gone]:
+            self._bump(int(expense_id))
+
+    def _bump(self, expense_id):
+        self._row_versions[expense_id] = self._row_versions.get(expense_id, 0) + 1
+
+    @traced("cache.apply_pending")
+    def _apply_pending(self):
+        df = self._frame
+        added = []  # consecutive adds are concatenated in one go
+
+        def flush(df):
+            if not added:
+                return df
+            rows = pd.DataFrame(added, columns=df.columns)
+            added.clear()
+            return rows if df.empty else pd.concat([df, rows], ignore_index=True)
+
+        for version, op, payload in self._pending:
+            if op == "reassign":
+                df = flush(df)
+                df['id'] = df['id'].replace(payload)
+                for old, new in payload.items():
+                    if old in self._row_versions:
+                        self._row_versions[int(new)] = self._row_versions.pop(old)
+                for observer in self.observers:
+                    if hasattr(observer, 'reassign'):
+                        observer.reassign(payload)
+            elif op in ("add", "add_many"):
+                rows = [payload] if op == "add" else payload
+                added.extend(rows)
+                for row in rows:
+                    for observer in self.observers:
+                        observer.apply(None, row)
+            else:
+                df = flush(df)
+                old_row = new_row = None
+                idx = df.index[df['id'] == payload['id']]
+                if len(idx):
+                    old_row = df.loc[idx[0]].to_dict()
+                if op == "update":
+                    for col, value in payload.items():
+                        if col in df.columns:
+                            df.loc[idx, col] = value
+                    if old_row is not None:
+                        new_row = dict(old_row, **payload)
+                elif op == "delete":
+                    df = df[df['id'] != payload['id']].reset_index(drop=True)
+                if old_row is not None:
+                    self._bump(int(payload['id']))
+                for observer in self.observers:
+                    observer.apply(old_row, new_row)
+            self._frame_version = version
+            self.stats["applied_changes"] += 1
+        self._pending.clear()
+        self._frame = flush(df)
+
+    # ----- change tracking -----
+    def record(self, op, payload):
+        with self._lock:
+            self.version += 1
+            if op != "delete" and payload is None:
+                # the store did not tell us what it wrote; a reload is the only safe option
+                self._stale = True
+            if self._stale:
+                self._pending.clear()
+            else:
+                self._pending.append((self.version, op, payload))
+
+    def invalidate(self, min_age=0.0):
+        """Force a full reload on the next read, unless the last one is younger than min_age seconds."""
+        with self._lock:
+            if min_age and not self._stale and time.monotonic() - self._last_full_load < min_age:
+                return False
+            self.version += 1
+            self._stale = True
+            self._pending.clear()
+            return True
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["version"] = self.version
+            stats["cached_rows"] = 0 if self._frame is None else len(self._frame)
+            stats["pending_changes"] = len(self._pending)
+            stats["derived"] = self.derived.snapshot_stats()
+            return stats
+
+
+def _share(value):
+    """A caller-private view of a shared frame (free under copy-on-write; the shared object otherwise)."""
+    if COPY_ON_WRITE:
+        if isinstance(value, tuple):
+            return tuple(_share(v) for v in value)
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy(deep=False)
+    return value
+
+
+def _conform(df):
+    df = df.copy()
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df['id'] = pd.to_numeric(df['id'], errors='coerce').astype('Int64')
+    df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+    return df.reset_index(drop=True)
+
+
+def _apply_net(df, net):
+    """Apply one coalesced write-behind mutation to a loaded frame."""
+    if net['op'] == 'add':
+        row = pd.DataFrame([dict(net['record'], id=net['id'])], columns=df.columns)
+        return row if df.empty else pd.concat([df, row], ignore_index=True)
+    idx = df.index[df['id'] == net['id']]
+    if net['op'] == 'delete':
+        return df.drop(idx).reset_index(drop=True)
+    for col, value in net['record'].items():
+        if col in df.columns:
+            df.loc[idx, col] = value
+    return df
+
+
+def _load_from_store():
+    if _writer is not None:
+        return _writer.load(lambda: _conform(get_backend().load_df()), _apply_net)
+    return get_backend().load_df()
+
+
+def _on_flushed(id_map):
+    if id_map is None:
+        # the backend could not tell us the new ids; re-read once the batch is in
+        _cache.invalidate()
+    elif id_map:
+        _cache.record("reassign", id_map)
+
+
+_writer = WriteBehindQueue(get_backend, on_flushed=_on_flushed) if WRITE_BEHIND else None
+_cache = ExpenseCache(_load_from_store)
+_write_lock = threading.RLock()
+_rollups = Rollups()
+_cache.observers.append(_rollups)
+_ledger = TripLedger()
+_cache.observers.append(_ledger)
+_search = SearchIndex()
+_cache.observers.append(_search)
+_budgets = BudgetStore()
+if _writer is not None:
+    atexit.register(_writer.wait_until_idle, 5.0)
+atexit.register(_search.save)
+
+
+# ---------- Public API ----------
+def get_expenses_df(force_reload=False):
+    if force_reload:
+        _cache.invalidate()
+    return _cache.frame()
+
+
+# apps.py still uses the older name
+get_expenses = get_expenses_df
+
+
+def get_view_frame():
+    """Sorted frame with parsed dates, `month`, `title` and `label`.
+
+    Shared by every session; with pandas copy-on-write each caller gets its
+    own view, otherwise treat it as read-only.
+    """
+    return _cache.view_frame()
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@traced("query.page")
+def query_expenses(sort_by='date', ascending=False, offset=0, limit=50, **filters):
+    """One page of expenses matching the filters, plus the total match count.
+
+    Filters: start, end (dates, inclusive), trips, categories (lists),
+    location (case-insensitive substring), min_amount, max_amount.
+    Pages are shared between sessions until the data changes.
+    """
+    key = ("query", sort_by, ascending, offset, limit, tuple(sorted((k, _freeze(v)) for k, v in filters.items())))
+    return _cache.derive(key, lambda view: run_query(view, sort_by=sort_by, ascending=ascending, offset=offset,
+                                                     limit=limit, **filters))
+
+
+def get_expense(expense_id):
+    """A single expense as a dict (None if missing), looked up through the id index."""
+    return _cache.get_row(_resolve(expense_id))
+
+
+def get_row_version(expense_id):
+    """Version to pass back as expected_version when saving an edit of this expense (None if missing)."""
+    return _cache.row_version(_resolve(expense_id))
+
+
+def refresh_expenses():
+    """Drop the cached frame so the next read goes back to the store.
+
+    Every session shares the cache, so clicks within WANDERLOG_REFRESH_MIN_AGE
+    seconds of the last full load reuse it instead of reading the store again.
+    """
+    return _cache.invalidate(min_age=REFRESH_MIN_AGE)
+
+
+def get_rollups():
+    """Analytics rollups reflecting every change made so far."""
+    _cache.sync()
+    return _rollups
+
+
+def get_budgets():
+    return _budgets.all()
+
+
+def set_trip_budget(trip, total=None, categories=None, start=None, end=None):
+    """Set (or replace) a trip's total and per-category budgets; None/0 means no limit."""
+    return _budgets.set(trip, total=total, categories=categories, start=start, end=end)
+
+
+def remove_trip_budget(trip):
+    _budgets.remove(trip)
+
+
+def get_budget_report():
+    """Spend, burn rate, projection and status for every budgeted trip, worst first."""
+    _cache.sync()
+    return budget_report(_ledger, _budgets.all())
+
+
+@traced("search.query")
+def search_expenses(text, limit=10):
+    """Expenses whose trip, location or description match text (prefixes and small typos allowed), best first."""
+    _cache.sync()
+    hits = []
+    for expense_id, score in _search.search(text, limit=limit):
+        row = _cache.get_row(expense_id)
+        if row is not None:
+            hits.append(dict(row, score=score))
+    # rows saved before their location was geocoded have no coordinates yet
+    missing = [h for h in hits if pd.isna(h.get('latitude')) and h.get('location')]
+    for hit, (lat, lon) in zip(missing, lookup_coordinates([h['location'] for h in missing])):
+        hit['latitude'], hit['longitude'] = lat, lon
+    return hits
+
+
+def search_stats():
+    return _search.snapshot_stats()
+
+
+def cache_stats():
+    return _cache.snapshot_stats()
+
+
+def write_queue_stats():
+    """Write-behind counters, or None when saves go straight to the backend."""
+    return _writer.snapshot_stats() if _writer is not None else None
+
+
+def _resolve(expense_id):
+    return _writer.resolve(expense_id) if _writer is not None else expense_id
+
+
+def _resolve_for_write(expense_id):
+    """_resolve(), refusing (UnresolvedIdError) a saved row whose id the backend never reported."""
+    expense_id = _resolve(expense_id)
+    if _writer is not None:
+        _writer.check_editable(expense_id)
+    return expense_id
+
+
+def _record(date, trip_name, category, amount, location, description, emoji, photo_path=None):
+    lat, lon = lookup_coordinates([location])[0]
+    if lat is None and location:
+        warm_cache_async([location])
+    return {
+        'date': date, 'trip_name': trip_name, 'category': category,
+        'amount': float(amount), 'location': location, 'description': description,
+        'emoji': emoji, 'photo_path': photo_path, 'latitude': lat, 'longitude': lon,
+    }
+
+
+def _row(stored):
+    if stored is None:
+        return None
+    row = dict(stored)
+    if row.get('date') is not None:
+        row['date'] = str(row['date'])
+    return row
+
+
+def add_expense(date, category, amount, location, description, emoji="", trip_name="", photo=None):
+    record = _record(date, trip_name, category, amount, location, description, emoji)
+    if _writer is not None:
+        if photo is not None:
+            record['photo_path'] = get_backend().save_photo(photo)
+        stored = dict(record, id=_writer.new_temp_id())
+        _writer.enqueue("add", stored['id'], record)
+    else:
+        stored = get_backend().add(record, photo=photo)
+    if stored and stored.get('photo_path'):
+        schedule_thumbnail(stored['photo_path'])
+    _cache.record("add", _row(stored))
+    return stored['id'] if stored else None
+
+
+def add_expenses_bulk(records):
+    """Save many expenses with one backend write. records are dicts of expense fields."""
+    rows = []
+    locations = [r.get('location') for r in records]
+    coords = lookup_coordinates(locations)
+    for record, (lat, lon) in zip(records, coords):
+        row = {col: record.get(col) for col in COLUMNS if col != 'id'}
+        row['latitude'], row['longitude'] = lat, lon
+        rows.append(row)
+    missing = [loc for loc, (lat, _) in zip(locations, coords) if lat is None and loc]
+    if missing:
+        warm_cache_async(missing)
+    if _writer is not None:
+        stored = [dict(row, id=_writer.new_temp_id()) for row in rows]
+        _writer.enqueue_many([("add", s['id'], row, None) for s, row in zip(stored, rows)])
+    else:
+        stored = get_backend().add_many(rows)
+    if stored is None or any(r is None for r in stored):
+        _cache.record("add_many", None)
+        return []
+    _cache.record("add_many", [_row(r) for r in stored])
+    return [r['id'] for r in stored]
+
+
+@contextmanager
+def _guarded_write(expense_id, expected_version):
+    # writers are serialized so the version check and the write cannot interleave with another session's
+    with _write_lock:
+        if expected_version is not None:
+            _cache.check_version(expense_id, expected_version)
+        yield
+
+
+def update_expense(expense_id, date, trip_name, category, amount, description, location, emoji, keep_photo=None, new_photo=None,
+                   expected_version=None):
+    """Save an edit. With expected_version (from get_row_version), raise StaleEditError if the row changed since."""
+    expense_id = _resolve_for_write(expense_id)
+    with _guarded_write(expense_id, expected_version):
+        record = _record(date, trip_name, category, amount, location, description, emoji, keep_photo)
+        if _writer is not None:
+            old_photo = None
+            if new_photo is not None:
+                record['photo_path'] = get_backend().save_photo(new_photo)
+                old_photo = keep_photo
+            stored = dict(record, id=expense_id)
+            _writer.enqueue("update", expense_id, record, old_photo=old_photo)
+        else:
+            stored = get_backend().update(expense_id, record, keep_photo=keep_photo, new_photo=new_photo)
+        if new_photo is not None and stored and stored.get('photo_path'):
+            schedule_thumbnail(stored['photo_path'])
+        _cache.record("update", _row(stored))
+
+
+def delete_expense(expense_id, expected_version=None):
+    # the backend releases the photo; its file and thumbnail go with the last reference
+    expense_id = _resolve_for_write(expense_id)
+    with _guarded_write(expense_id, expected_version):
+        if _writer is not None:
+            _writer.enqueue("delete", expense_id)
+        else:
+            get_backend().delete(expense_id)
+        _cache.record("delete", {'id': expense_id})
+
+
+def upload_dir():
+    return get_backend().upload_dir
+
+
+def photo_store_stats():
+    """Files, references and bytes in the content-addressed photo store."""
+    return get_store(upload_dir()).stats()
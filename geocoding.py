@@ -0,0 +1,343 @@
+# geocoding.py
+# Location -> (latitude, longitude) lookups backed by a persistent cache.
+#
+# Pages must never geocode while rendering: they read coordinates with
+# `lookup_coordinates` / `attach_coordinates`, which only touch the cache.
+# Saving an expense stores the cached coordinates when there are any; a miss
+# is saved without them and handed to the background warmer (or resolved by
+# `python geocoding.py warm`). Stored rows are not patched afterwards, so
+# anything that needs coordinates reads them through `attach_coordinates`.
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from instrumentation import span, traced
+
+GEOCODE_DB = os.environ.get("WANDERLOG_GEOCODE_DB", "geocode_cache.db")
+GEOCODER = os.environ.get("WANDERLOG_GEOCODER", "nominatim")  # "nominatim" or "gazetteer"
+GAZETTEER_PATH = os.environ.get("WANDERLOG_GAZETTEER", "gazetteer.csv")
+LRU_SIZE = 4096
+
+MISSING = (None, None)
+
+
+# ---------- Normalization ----------
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_location(loc):
+    """Cache key for a free-text location: trimmed, single-spaced, casefolded."""
+    if loc is None:
+        return ""
+    try:
+        if loc != loc:  # NaN
+            return ""
+    except Exception:
+        pass
+    return _SPACES.sub(" ", str(loc)).strip().casefold()
+
+
+# ---------- Providers ----------
+class NominatimProvider:
+    """OpenStreetMap Nominatim via geopy, throttled to its 1 request/second policy."""
+    name = "nominatim"
+
+    def __init__(self, user_agent="travel_expense_app", min_interval=1.0):
+        self.user_agent = user_agent
+        self.min_interval = min_interval
+        self._geolocator = None
+        self._last_call = 0.0
+        self._lock = threading.Lock()
+
+    def geocode(self, query):
+        with self._lock:
+            if self._geolocator is None:
+                from geopy.geocoders import Nominatim
+                self._geolocator = Nominatim(user_agent=self.user_agent)
+            wait = self.min_interval - (time.monotonic() - self._last_call)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                location = self._geolocator.geocode(query)
+            finally:
+                self._last_call = time.monotonic()
+        if location:
+            return (location.latitude, location.longitude)
+        return MISSING
+
+
+class GazetteerProvider:
+    """Offline provider reading a local CSV with `location,latitude,longitude` columns."""
+    name = "gazetteer"
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.path = path
+        self._table = None
+
+    def _load(self):
+        table = {}
+        if os.path.exists(self.path):
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        table[normalize_location(row["location"])] = (float(row["latitude"]), float(row["longitude"]))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        self._table = table
+
+    def geocode(self, query):
+        if self._table is None:
+            self._load()
+        return self._table.get(normalize_location(query), MISSING)
+
+
+def default_provider():
+    if GEOCODER == "gazetteer":
+        return GazetteerProvider()
+    return NominatimProvider()
+
+
+# ---------- Cache ----------
+class _LRU:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class GeocodeCache:
+    """SQLite table of resolved locations with an in-process LRU in front of it.
+
+    Misses are stored too (NULL coordinates) so a location that cannot be
+    resolved is not looked up again on every save.
+    """
+
+    def __init__(self, path=GEOCODE_DB, lru_size=LRU_SIZE):
+        self.path = path
+        self.lru = _LRU(lru_size)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " key TEXT PRIMARY KEY, query TEXT, latitude REAL, longitude REAL,"
+                " provider TEXT, updated_at REAL)"
+            )
+
+    @traced("geocode.cache_lookup")
+    def get_many(self, keys):
+        """Return {key: (lat, lon)} for the keys present in the cache."""
+        found = {}
+        pending = []
+        for key in keys:
+            hit = self.lru.get(key)
+            if hit is not None:
+                found[key] = hit
+            else:
+                pending.append(key)
+        # SQLite caps bound parameters; 500 per query is well under the limit
+        for start in range(0, len(pending), 500):
+            chunk = pending[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, latitude, longitude FROM geocode WHERE key IN ({marks})", chunk
+                ).fetchall()
+            for key, lat, lon in rows:
+                value = (lat, lon)
+                self.lru.put(key, value)
+                found[key] = value
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, query, coords, provider=""):
+        lat, lon = coords
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, query, latitude, longitude, provider, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, query, lat, lon, provider, time.time()),
+            )
+        self.lru.put(key, (lat, lon))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_provider = None
+_state_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _state_lock:
+        if _cache is None:
+            _cache = GeocodeCache()
+        return _cache
+
+
+def get_provider():
+    global _provider
+    with _state_lock:
+        if _provider is None:
+            _provider = default_provider()
+        return _provider
+
+
+def configure(cache=None, provider=None):
+    """Swap the cache and/or provider, e.g. a temp-file cache and a gazetteer in tests."""
+    global _cache, _provider
+    with _state_lock:
+        if cache is not None:
+            _cache = cache
+        if provider is not None:
+            _provider = provider
+
+
+# ---------- Provider lookups (may block) ----------
+def geocode_many(locations, provider=None):
+    """Resolve every distinct location once, hitting the provider only for cache misses.
+
+    Returns {normalized key: (lat, lon)}.
+    """
+    cache = get_cache()
+    provider = provider or get_provider()
+    queries = {}
+    for loc in locations:
+        key = normalize_location(loc)
+        if key and key not in queries:
+            queries[key] = str(loc).strip()
+    result = cache.get_many(list(queries))
+    for key, query in queries.items():
+        if key in result:
+            continue
+        try:
+            with span("geocode.provider", provider=provider.name):
+                coords = provider.geocode(query)
+        except Exception:
+            # transient provider failure: leave it uncached so it is retried later
+            result[key] = MISSING
+            continue
+        cache.put(key, query, coords, provider.name)
+        result[key] = coords
+    return result
+
+
+def geocode_location(loc):
+    """Coordinates for a single location, geocoding on a cache miss. Blocks on the provider."""
+    key = normalize_location(loc)
+    if not key:
+        return MISSING
+    return geocode_many([loc]).get(key, MISSING)
+
+
+# ---------- Render-time lookups (cache only) ----------
+def lookup_coordinates(locations):
+    """Cached coordinates for each location, (None, None) where not yet resolved. Never geocodes."""
+    keys = [normalize_location(loc) for loc in locations]
+    found = get_cache().get_many({k for k in keys if k})
+    return [found.get(k, MISSING) for k in keys]
+
+
+@traced("geocode.attach_coordinates")
+def attach_coordinates(df, location_col="location", warm_missing=True):
+    """Fill missing `latitude`/`longitude` on df from the cache, one lookup per distinct location.
+
+    Locations the cache has never seen are handed to the background warmer so
+    they show up on a later rerun instead of blocking this one.
+    """
+    df = df.copy()
+    for col in ("latitude", "longitude"):
+        if col not in df.columns:
+            df[col] = None
+        # blank Sheets cells come back as "" rather than None
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    if df.empty or location_col not in df.columns:
+        return df
+    need = df["latitude"].isna() | df["longitude"].isna()
+    if not need.any():
+        return df
+    keys = df.loc[need, location_col].map(normalize_location)
+    distinct = [k for k in keys.unique() if k]
+    found = get_cache().get_many(distinct)
+    df.loc[need, "latitude"] = keys.map(lambda k: found.get(k, MISSING)[0]).astype("float64")
+    df.loc[need, "longitude"] = keys.map(lambda k: found.get(k, MISSING)[1]).astype("float64")
+    if warm_missing:
+        unseen = [k for k in distinct if k not in found]
+        if unseen:
+            originals = df.loc[need, location_col][keys.isin(unseen)].drop_duplicates()
+            warm_cache_async(originals.tolist())
+    return df
+
+
+_warm_lock = threading.Lock()
+_warm_pending = set()
+_warm_thread = None
+
+
+def _warm_worker():
+    global _warm_thread
+    while True:
+        with _warm_lock:
+            if not _warm_pending:
+                _warm_thread = None
+                return
+            batch = list(_warm_pending)
+            _warm_pending.clear()
+        geocode_many(batch)
+
+
+def warm_cache_async(locations):
+    """Geocode locations on a single daemon thread; duplicate requests are merged."""
+    global _warm_thread
+    with _warm_lock:
+        _warm_pending.update(loc for loc in locations if normalize_location(loc))
+        if _warm_thread is None and _warm_pending:
+            _warm_thread = threading.Thread(target=_warm_worker, name="geocode-warmer", daemon=True)
+            _warm_thread.start()
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm the geocoding cache.")
+    parser.add_argument("command", choices=["warm"])
+    parser.add_argument("locations", nargs="*", help="locations to resolve (default: every stored expense)")
+    args = parser.parse_args()
+
+    locations = args.locations
+    if not locations:
+        from storage import get_backend
+        locations = get_backend().load_df()["location"].dropna().tolist()
+    resolved = geocode_many(locations)
+    hits = sum(1 for coords in resolved.values() if coords[0] is not None)
+    print(f"{len(resolved)} distinct locations, {hits} resolved")
@@ -0,0 +1,177 @@
+# instrumentation.py
+# Timing spans for the hot paths: storage calls, geocoding, image I/O, cache
+# maintenance, page sections and chart builds.
+#
+#   with span("chart.timeline.render"):
+#       st.plotly_chart(fig)
+#
+#   @traced("sheets.load_df")
+#   def load_df(self): ...
+#
+# Finished spans go into a bounded in-memory ring buffer (WANDERLOG_SPAN_BUFFER
+# entries) that the Settings page summarizes as p50/p95 per span name plus the
+# slowest recent operations. Setting WANDERLOG_SPAN_LOG (or enabling export on
+# the Settings page, which writes to logs/spans.jsonl) also appends every span
+# to a JSON-lines file. The file is only ever chosen by whoever starts the
+# server; the page can switch export on and off but not point it elsewhere.
+# A span costs two perf_counter calls and a deque append, so they stay on in
+# production.
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+BUFFER_SIZE = int(os.environ.get("WANDERLOG_SPAN_BUFFER", "5000"))
+SPAN_LOG = os.environ.get("WANDERLOG_SPAN_LOG") or None
+DEFAULT_SPAN_LOG = os.path.join("logs", "spans.jsonl")
+
+_spans = deque(maxlen=BUFFER_SIZE)
+_local = threading.local()
+_export_lock = threading.Lock()
+_export_path = SPAN_LOG
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block and record it under name (nested spans remember their parent)."""
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    error = None
+    start_wall = time.time()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        record = {"name": name, "start": start_wall, "ms": duration * 1000.0, "parent": parent,
+                  "thread": threading.current_thread().name}
+        if attrs:
+            record["attrs"] = attrs
+        if error:
+            record["error"] = error
+        _spans.append(record)
+        if _export_path:
+            _export(record)
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ---------- Export ----------
+def _export(record):
+    line = json.dumps(record, default=str) + "\n"
+    with _export_lock:
+        path = _export_path
+        if not path:
+            return
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass  # instrumentation must never break the page
+
+
+def set_export(enabled):
+    """Start or stop appending spans to WANDERLOG_SPAN_LOG (default logs/spans.jsonl)."""
+    global _export_path
+    path = log_path()
+    if enabled:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with _export_lock:
+        _export_path = path if enabled else None
+
+
+def log_path():
+    """Where exported spans go, whether or not export is on."""
+    return SPAN_LOG or DEFAULT_SPAN_LOG
+
+
+def export_path():
+    """The file spans are being appended to, or None when export is off."""
+    return _export_path
+
+
+# ---------- Queries ----------
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def recent_spans():
+    return list(_spans)
+
+
+def summary():
+    """Per span name: count, p50, p95, max and total milliseconds, slowest p95 first."""
+    by_name = {}
+    for record in list(_spans):
+        by_name.setdefault(record["name"], []).append(record["ms"])
+    rows = []
+    for name, values in by_name.items():
+        values.sort()
+        rows.append({"span": name, "count": len(values), "p50_ms": _percentile(values, 0.5),
+                     "p95_ms": _percentile(values, 0.95), "max_ms": values[-1], "total_ms": sum(values)})
+    rows.sort(key=lambda r: r["p95_ms"], reverse=True)
+    return rows
+
+
+def slowest(n=10):
+    """The n longest spans still in the buffer."""
+    return sorted(list(_spans), key=lambda r: r["ms"], reverse=True)[:n]
+
+
+def clear():
+    _spans.clear()
+
+
+# ---------- Profiling ----------
+@contextmanager
+def profiled(limit=40, sort="cumulative"):
+    """cProfile the enclosed block; the yielded dict gets 'text' (pstats report) afterwards."""
+    result = {}
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # another profiler (a debugger, coverage) is already attached; run unprofiled
+        result["text"] = f"profiling unavailable: {e}"
+        yield result
+        return
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        result["text"] = out.getvalue()
+        result["captured_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,103 @@
+# lod.py
+# Level of detail for the charts: keep what is sent to the browser bounded.
+#
+# Maps cluster nearby points into grid cells and timelines bucket events by
+# day/week/month until a chart fits its point budget. Each cluster/bucket
+# keeps the fields of its largest expense, so hover text, colours and labels
+# still work with the existing Plotly calls.
+import os
+
+import numpy as np
+import pandas as pd
+
+# max markers per chart; override with e.g. WANDERLOG_BUDGET_TIMELINE=300
+CHART_BUDGETS = {
+    "timeline": 400,
+    "journey_map": 1500,
+    "analytics_map": 1500,
+}
+TIMELINE_LABELS = 15
+TIMELINE_FREQUENCIES = [("D", "day"), ("W", "week"), ("M", "month"), ("Q", "quarter"), ("Y", "year")]
+
+
+def chart_budget(chart):
+    value = os.environ.get(f"WANDERLOG_BUDGET_{chart.upper()}")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            pass
+    return CHART_BUDGETS.get(chart, 1000)
+
+
+def _summarize(df, key):
+    """One row per key, indexed by key: the largest expense's fields plus summed amount and count."""
+    ordered = df.assign(_key=key.to_numpy()).sort_values('amount', ascending=False, kind='stable')
+    out = ordered.drop_duplicates('_key').set_index('_key')
+    grouped = ordered.groupby('_key', sort=False)['amount']
+    out['amount'] = grouped.sum()
+    out['count'] = grouped.size()
+    return out
+
+
+# ---------- Maps ----------
+def cluster_points(df, budget, lat="latitude", lon="longitude", start_cell=0.01):
+    """Merge points into lat/lon grid cells, doubling the cell size until at most `budget` remain.
+
+    Returns a frame with the input columns plus `count`; clustered rows sit at
+    the mean position of their members and describe themselves in `description`.
+    """
+    df = df.dropna(subset=[lat, lon])
+    if len(df) <= budget:
+        return df.assign(count=1)
+    lat_v = df[lat].to_numpy(dtype=float)
+    lon_v = df[lon].to_numpy(dtype=float)
+    cell = start_cell
+    while True:
+        key = np.floor(lat_v / cell).astype(np.int64) * 1_000_003 + np.floor(lon_v / cell).astype(np.int64)
+        if len(pd.unique(key)) <= budget or cell >= 180:
+            break
+        cell *= 2
+    key = pd.Series(key, index=df.index)
+    out = _summarize(df, key)
+    centers = df[[lat, lon]].groupby(key).mean()
+    out[lat] = centers[lat]
+    out[lon] = centers[lon]
+    out = out.reset_index(drop=True)
+    if 'description' in out.columns:
+        many = out['count'] > 1
+        out.loc[many, 'description'] = out.loc[many, 'count'].astype(str) + " expenses nearby"
+    return out
+
+
+# ---------- Timeline ----------
+def bucket_timeline(df, budget, date="date"):
+    """Group events into the finest of day/week/month/quarter/year that fits `budget`.
+
+    Returns (frame, unit) where unit is None when no bucketing was needed.
+    Bucketed rows are dated at the bucket start and carry `count`.
+    """
+    df = df.dropna(subset=[date])
+    if len(df) <= budget:
+        return df.assign(count=1), None
+    for freq, unit in TIMELINE_FREQUENCIES:
+        key = df[date].dt.to_period(freq).dt.start_time
+        if key.nunique() <= budget:
+            break
+    out = _summarize(df, key)
+    out[date] = out.index
+    out = out.reset_index(drop=True)
+    if 'label' in out.columns:
+        many = out['count'] > 1
+        out.loc[many, 'label'] = out.loc[many, 'label'] + " +" + (out.loc[many, 'count'] - 1).astype(str) + " more"
+    return out.sort_values(date).reset_index(drop=True), unit
+
+
+def top_labels(df, n=TIMELINE_LABELS, label="label", by="amount"):
+    """Labels for the n largest rows, empty strings elsewhere."""
+    text = pd.Series("", index=df.index, dtype=object)
+    if df.empty:
+        return text
+    top = df[by].nlargest(n).index
+    text.loc[top] = df.loc[top, label].astype(str)
+    return text
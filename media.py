@@ -0,0 +1,325 @@
+# media.py
+# Content-addressed store for expense photos.
+#
+# An upload is keyed by the SHA-256 of its bytes and written once under
+# <upload_dir>/media/<2 hex>/<key>.<ext>, so the same photo attached to
+# several expenses occupies disk once. Originals larger than
+# WANDERLOG_PHOTO_MAX_PX on their long side are downscaled and re-encoded
+# (JPEG, or WebP when there is transparency); a re-encode that does not make
+# the file smaller keeps the original bytes. A reference count per key in
+# <upload_dir>/media.db decides when a file (and its thumbnail) can go.
+#
+#   python media.py stats
+#   python media.py gc [--dry-run]     # fix refcounts from the expense table, drop orphans
+#   python media.py compact            # move pre-store uploads into the store, deduplicated
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from instrumentation import traced
+from thumbnails import IMAGE_EXTENSIONS, THUMB_SUFFIX, is_thumbnail, remove_thumbnails
+
+MAX_PX = int(os.environ.get("WANDERLOG_PHOTO_MAX_PX", "2048"))
+QUALITY = int(os.environ.get("WANDERLOG_PHOTO_QUALITY", "82"))
+MEDIA_DIR = "media"
+
+_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _read_upload(uploaded_file):
+    if hasattr(uploaded_file, "getvalue"):
+        return bytes(uploaded_file.getvalue())
+    if hasattr(uploaded_file, "getbuffer"):
+        return bytes(uploaded_file.getbuffer())
+    return uploaded_file.read()
+
+
+def encode_photo(data, name="", max_px=MAX_PX, quality=QUALITY):
+    """(bytes, extension) to store for an uploaded image: downscaled/re-encoded when that helps."""
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in IMAGE_EXTENSIONS:
+        ext = ".jpg"
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return data, ext
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            transposed = ImageOps.exif_transpose(img)
+            too_big = max(transposed.size) > max_px
+            has_alpha = "A" in transposed.getbands() or "transparency" in transposed.info
+            if too_big:
+                transposed.thumbnail((max_px, max_px))
+            out = io.BytesIO()
+            if has_alpha:
+                transposed.save(out, "WEBP", quality=quality, method=4)
+                new_ext = ".webp"
+            else:
+                transposed.convert("RGB").save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+                new_ext = ".jpg"
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return data, ext
+    encoded = out.getvalue()
+    if too_big or len(encoded) < len(data):
+        return encoded, new_ext
+    return data, ext
+
+
+class MediaStore:
+    """Photos on disk keyed by content hash, with reference counts in SQLite."""
+
+    def __init__(self, upload_dir, max_px=MAX_PX, quality=QUALITY):
+        self.upload_dir = upload_dir
+        self.root = os.path.join(upload_dir, MEDIA_DIR)
+        self.max_px = max_px
+        self.quality = quality
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(upload_dir, "media.db"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS media ("
+                " key TEXT PRIMARY KEY, path TEXT, refs INTEGER, bytes INTEGER,"
+                " original_bytes INTEGER, created_at REAL)"
+            )
+
+    # ----- keys and paths -----
+    def key_for(self, path):
+        """The content key of a stored photo path, or None for files outside the store."""
+        if not path or not isinstance(path, str):
+            return None
+        stem = os.path.basename(path).split(".")[0]
+        if not _KEY.match(stem):
+            return None
+        return stem
+
+    def owns(self, path):
+        return self.key_for(path) is not None
+
+    def _path(self, key, ext):
+        return os.path.join(self.root, key[:2], key + ext)
+
+    # ----- references -----
+    @traced("image.media_put")
+    def put(self, uploaded_file):
+        """Store an upload (or take another reference to an identical one) and return its path."""
+        data = _read_upload(uploaded_file)
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM media WHERE key = ?", (key,)).fetchone()
+            if row and os.path.exists(row[0]):
+                with self._conn:
+                    self._conn.execute("UPDATE media SET refs = refs + 1 WHERE key = ?", (key,))
+                return row[0]
+        encoded, ext = encode_photo(data, getattr(uploaded_file, "name", "") or "", self.max_px, self.quality)
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp, path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO media (key, path, refs, bytes, original_bytes, created_at) VALUES (?, ?, 1, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET refs = refs + 1, path = excluded.path",
+                (key, path, len(encoded), len(data), time.time()))
+        return path
+
+    def acquire(self, path):
+        """Add a reference to an already stored photo (e.g. a row copied to another expense)."""
+        key = self.key_for(path)
+        if key is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE media SET refs = refs + 1 WHERE key = ?", (key,))
+
+    def release(self, path):
+        """Drop one reference; the file and its thumbnail are deleted with the last one."""
+        key = self.key_for(path)
+        if key is None:
+            return None
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT refs, path FROM media WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return 0
+            refs = row[0] - 1
+            if refs > 0:
+                self._conn.execute("UPDATE media SET refs = ? WHERE key = ?", (refs, key))
+                return refs
+            self._conn.execute("DELETE FROM media WHERE key = ?", (key,))
+        self._unlink(row[1])
+        return 0
+
+    def _unlink(self, path):
+        remove_thumbnails(path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # ----- maintenance -----
+    def stats(self):
+        with self._lock:
+            files, refs, stored, original = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(refs), 0), COALESCE(SUM(bytes), 0),"
+                " COALESCE(SUM(original_bytes * refs), 0) FROM media").fetchone()
+        return {"files": files, "references": refs, "bytes": stored,
+                # what the same references took as one untouched upload each
+                "bytes_without_store": original,
+                "saved_bytes": max(0, original - stored)}
+
+    def gc(self, referenced_paths, dry_run=False):
+        """Reset refcounts to what the expense table actually references and delete the rest.
+
+        referenced_paths is every photo_path currently in use. Store files with
+        no reference, and loose files in upload_dir that no expense points to,
+        are removed. Returns {"removed": n, "bytes": reclaimed, "fixed_refs": n}.
+        """
+        counts = {}
+        loose_in_use = set()
+        for path in referenced_paths:
+            key = self.key_for(path)
+            if key is not None:
+                counts[key] = counts.get(key, 0) + 1
+            elif isinstance(path, str) and path:
+                loose_in_use.add(os.path.abspath(path))
+        report = {"removed": 0, "bytes": 0, "fixed_refs": 0}
+
+        def drop(path):
+            report["removed"] += 1
+            report["bytes"] += os.path.getsize(path) if os.path.exists(path) else 0
+            if not dry_run:
+                self._unlink(path)
+
+        with self._lock:
+            rows = self._conn.execute("SELECT key, refs, path FROM media").fetchall()
+        known = set()
+        for key, refs, path in rows:
+            known.add(key)
+            want = counts.get(key, 0)
+            if want == refs:
+                continue
+            report["fixed_refs"] += 1
+            if not dry_run:
+                with self._lock, self._conn:
+                    if want:
+                        self._conn.execute("UPDATE media SET refs = ? WHERE key = ?", (want, key))
+                    else:
+                        self._conn.execute("DELETE FROM media WHERE key = ?", (key,))
+            if not want:
+                drop(path)
+
+        # files on disk the table does not know about (crash between write and insert)
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                key = self.key_for(name)
+                if name.endswith(".tmp") or (key and key not in counts and (is_thumbnail(name) or key not in known)):
+                    drop(path)
+                elif key and key not in known and not is_thumbnail(name):
+                    # referenced but missing from the table: register it again
+                    report["fixed_refs"] += 1
+                    if not dry_run:
+                        with self._lock, self._conn:
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO media (key, path, refs, bytes, original_bytes, created_at)"
+                                " VALUES (?, ?, ?, ?, ?, ?)",
+                                (key, path, counts[key], os.path.getsize(path), os.path.getsize(path), time.time()))
+        # pre-store uploads nothing points at any more
+        if os.path.isdir(self.upload_dir):
+            for name in os.listdir(self.upload_dir):
+                path = os.path.join(self.upload_dir, name)
+                if not os.path.isfile(path) or not name.lower().endswith(IMAGE_EXTENSIONS + (THUMB_SUFFIX,)):
+                    continue
+                original = path[:-len(THUMB_SUFFIX)] if is_thumbnail(name) else path
+                if not any(os.path.abspath(p) in loose_in_use for p in _original_candidates(original)):
+                    drop(path)
+        return report
+
+    def ingest(self, path):
+        """Copy a loose (pre-store) photo into the store; returns its new path or None if unreadable."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        upload = io.BytesIO(data)
+        upload.name = os.path.basename(path)
+        return self.put(upload)
+
+
+def _original_candidates(stem_or_path):
+    # a thumbnail `x.thumb.webp` belongs to `x.<any image extension>`
+    if os.path.splitext(stem_or_path)[1].lower() in IMAGE_EXTENSIONS:
+        return [stem_or_path]
+    return [stem_or_path + ext for ext in IMAGE_EXTENSIONS]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(upload_dir):
+    """One MediaStore per uploads folder for the life of the process."""
+    key = os.path.abspath(upload_dir)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = MediaStore(upload_dir)
+        return _stores[key]
+
+
+def compact(backend, store=None):
+    """Move every expense photo that predates the store into it (deduplicated and re-encoded).
+
+    Rows are repointed through backend.update; the old files are left for gc.
+    Returns the number of rows repointed.
+    """
+    store = store or get_store(backend.upload_dir)
+    df = backend.load_df()
+    moved = {}
+    count = 0
+    for row in df.to_dict("records"):
+        path = row.get("photo_path")
+        if not isinstance(path, str) or not path or store.owns(path) or not os.path.exists(path):
+            continue
+        if path in moved:
+            new_path = moved[path]
+            store.acquire(new_path)
+        else:
+            new_path = moved[path] = store.ingest(path)
+        if new_path is None:
+            continue
+        record = {k: row.get(k) for k in row if k != "id"}
+        record["photo_path"] = new_path
+        backend.update(row["id"], record, keep_photo=new_path)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed photo store.")
+    parser.add_argument("command", choices=["stats", "gc", "compact"])
+    parser.add_argument("--dry-run", action="store_true", help="gc: report what would be removed")
+    args = parser.parse_args()
+
+    from storage import get_backend
+    backend = get_backend()
+    store = get_store(backend.upload_dir)
+    if args.command == "compact":
+        print(f"moved {compact(backend, store)} photos into {store.root}; run `python media.py gc` to drop the old files")
+    elif args.command == "gc":
+        # read through data_access so saves still waiting in the write-behind journal count as references
+        from data_access import get_expenses_df
+        report = store.gc(get_expenses_df()['photo_path'].dropna().tolist(), dry_run=args.dry_run)
+        verb = "would remove" if args.dry_run else "removed"
+        print(f"{verb} {report['removed']} files ({report['bytes'] / 1e6:.1f} MB), fixed {report['fixed_refs']} refcounts")
+    else:
+        stats = store.stats()
+        print(f"{stats['files']} files, {stats['references']} references, {stats['bytes'] / 1e6:.1f} MB on disk, "
+              f"{stats['saved_bytes'] / 1e6:.1f} MB saved by dedup and re-encoding")
@@ -0,0 +1,53 @@
+# query.py
+# Filtering, sorting and paging over the prepared expense frame.
+#
+# Works on the frame from data_access.get_view_frame() (dates already
+# parsed), so a query is a handful of vectorized masks plus one slice.
+import pandas as pd
+
+SORT_KEYS = ['date', 'amount', 'trip_name', 'category', 'location', 'id']
+
+
+def filter_mask(df, start=None, end=None, trips=None, categories=None, location=None,
+                min_amount=None, max_amount=None):
+    """Boolean Series selecting the rows that pass every given filter (None means no filter)."""
+    mask = pd.Series(True, index=df.index)
+    if start is not None or end is not None:
+        dates = df['date'] if pd.api.types.is_datetime64_any_dtype(df['date']) else pd.to_datetime(df['date'], errors='coerce')
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            # end is inclusive of the whole day
+            mask &= dates < pd.Timestamp(end) + pd.Timedelta(days=1)
+    if trips:
+        mask &= df['trip_name'].isin(trips)
+    if categories:
+        mask &= df['category'].isin(categories)
+    if location:
+        mask &= df['location'].fillna('').astype(str).str.contains(location, case=False, regex=False)
+    if min_amount is not None:
+        mask &= df['amount'] >= min_amount
+    if max_amount is not None:
+        mask &= df['amount'] <= max_amount
+    return mask
+
+
+def run_query(df, sort_by='date', ascending=False, offset=0, limit=50, **filters):
+    """One page of matching rows plus the total match count: (page, total)."""
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Cannot sort by '{sort_by}', expected one of {SORT_KEYS}")
+    active = {k: v for k, v in filters.items() if v not in (None, '', [], ())}
+    matched = df[filter_mask(df, **active)] if active else df
+    total = len(matched)
+    offset = max(0, int(offset))
+    if limit is None:
+        return matched.sort_values(sort_by, ascending=ascending, kind='stable'), total
+    want = offset + int(limit)
+    key = matched[sort_by]
+    orderable = pd.api.types.is_numeric_dtype(key) or pd.api.types.is_datetime64_any_dtype(key)
+    if want < total and orderable and not key.isna().any():
+        # partial selection is O(n) instead of a full sort
+        head = matched.nsmallest(want, sort_by) if ascending else matched.nlargest(want, sort_by)
+    else:
+        head = matched.sort_values(sort_by, ascending=ascending, kind='stable')
+    return head.iloc[offset:want], total
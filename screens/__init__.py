@@ -0,0 +1,12 @@
+# screens/__init__.py
+# One module per sidebar page, each exposing render(). app.py imports only
+# the selected page, so a page's heavy libraries (plotly, PIL, ...) load
+# the first time that page is opened rather than on every cold start.
+PAGES = {
+    "Add Expense": "add_expense",
+    "View Expenses": "view_expenses",
+    "Journey Timeline": "journey_timeline",
+    "Analytics": "analytics_dashboard",
+    "Import / Export": "import_export",
+    "Settings": "settings",
+}
@@ -0,0 +1,34 @@
+# screens/add_expense.py
+import streamlit as st
+
+from data_access import add_expense
+from validation import validate_expense
+
+
+def render():
+    st.subheader("Add a New Travel Expense (with memory)")
+    with st.form("add_form", clear_on_submit=True):
+        date = st.date_input("Date")
+        trip_name = st.text_input("Trip name (e.g., 'Mumbai Conference', 'Kerala Trip')")
+        category = st.selectbox("Category", ["Flight", "Hotel", "Food", "Transport", "Sightseeing", "Other"])
+        amount = st.number_input("Amount (INR)", min_value=0.0, step=1.0)
+        location = st.text_input("Location (City, Country or landmark)")
+        emoji = st.text_input("Emoji (single emoji e.g. ✨ 🍛 🏨) — optional", max_chars=4)
+        description = st.text_area("Short memory/description (optional)")
+        uploaded_file = st.file_uploader("Attach a photo memory (optional)", type=["png","jpg","jpeg","webp"])
+        submitted = st.form_submit_button("Save Memory & Expense")
+
+        submitted = st.form_submit_button("Add Expense")
+
+    if submitted:
+        # ---- Validation checks (shared with bulk import) ----
+        errors = validate_expense(category, amount, location, description, emoji)
+
+        if errors:
+            for e in errors:
+                st.warning(e)
+        else:
+            # ✅ Save to DB
+            add_expense(date, category, float(amount), location, description, emoji,
+                        trip_name=trip_name, photo=uploaded_file)
+            st.success("✅ Expense added successfully!")
@@ -0,0 +1,112 @@
+# screens/analytics_dashboard.py
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from data_access import get_budget_report, get_budgets, get_rollups, remove_trip_budget, set_trip_budget
+from instrumentation import span, traced
+from screens.budget_alerts import render_alerts
+from screens.charts import show_chart
+from validation import CATEGORIES
+
+
+@traced("chart.category.build")
+def category_figure(cat_df):
+    fig = px.pie(cat_df, names='category', values='amount', hole=0.45, title="Spending by Category")
+    fig.update_traces(textinfo='percent+label')
+    return fig
+
+
+@traced("chart.monthly.build")
+def monthly_figure(monthly):
+    bar = px.bar(monthly, x='label', y='amount', title="Monthly Spend", labels={'amount':'Amount (₹)', 'label':'month'})
+    bar.update_xaxes(categoryorder='array', categoryarray=monthly['label'])
+    return bar
+
+
+@traced("chart.locations.build")
+def locations_figure(loc_sum):
+    return px.bar(loc_sum, x='location', y='amount', title="Top Spending Locations")
+
+
+def render():
+    st.subheader("Cinematic Analytics — Insights & Top Stories")
+    rollups = get_rollups()
+    if rollups.count == 0:
+        st.info("No data yet. Add expenses to view insights.")
+    else:
+        total = rollups.total
+        avg = rollups.average()
+        top_loc = rollups.top_key('location')
+        top_cat = rollups.top_key('category')
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Total Spent", f"₹{total:,.2f}")
+        c2.metric("Avg Expense", f"₹{avg:,.2f}")
+        c3.metric("Top Location", top_loc)
+        c4.metric("Top Category", top_cat)
+
+        with span("section.analytics.budget_alerts"):
+            report = get_budget_report()
+            render_alerts(report)
+
+        st.markdown("---")
+        # category donut
+        show_chart("category", category_figure(rollups.totals_by('category')))
+
+        # monthly bar (chronological, not alphabetical)
+        show_chart("monthly", monthly_figure(rollups.monthly()))
+
+        # top locations
+        loc_sum = rollups.top('location', 8)
+        if not loc_sum.empty:
+            show_chart("locations", locations_figure(loc_sum))
+
+        st.markdown("---")
+        with span("section.analytics.budgets"):
+            render_budgets(report, rollups.totals_by('trip_name')['trip_name'].tolist())
+
+
+def render_budgets(report, trips):
+    st.markdown("#### Trip Budgets")
+    if report:
+        table = pd.DataFrame([{
+            "Trip": r['trip'], "Budget": r['budget'], "Spent": r['spent'],
+            "Left": r['remaining'], "₹/day": r['burn_rate'], "Projected": r['projected'],
+            "Status": r['status'].replace('_', ' '),
+        } for r in report])
+        st.dataframe(table.style.format({c: "₹{:,.0f}" for c in ["Budget", "Spent", "Left", "₹/day", "Projected"]}, na_rep="—"),
+                     use_container_width=True)
+    else:
+        st.markdown("<div class='small-muted'>No budgets yet. Set one below to track burn rate and overspend.</div>", unsafe_allow_html=True)
+
+    if not trips:
+        return
+    with st.expander("Set a trip budget"):
+        trip = st.selectbox("Trip", trips, key="budget_trip")
+        current = get_budgets().get(trip) or {}
+        with st.form("budget_form"):
+            total = st.number_input("Total budget (INR, 0 = none)", min_value=0.0, step=500.0, value=float(current.get('total') or 0.0))
+            use_dates = st.checkbox("Project spend to a trip end date", value=bool(current.get('end')))
+            d1, d2 = st.columns(2)
+            today = pd.Timestamp.today().date()
+            start = d1.date_input("Trip start", value=pd.to_datetime(current['start']).date() if current.get('start') else today)
+            end = d2.date_input("Trip end", value=pd.to_datetime(current['end']).date() if current.get('end') else today)
+            st.markdown("<div class='small-muted'>Per-category limits (0 = none)</div>", unsafe_allow_html=True)
+            cols = st.columns(3)
+            limits = {}
+            for i, category in enumerate(CATEGORIES):
+                limits[category] = cols[i % 3].number_input(category, min_value=0.0, step=100.0,
+                                                            value=float((current.get('categories') or {}).get(category, 0.0)))
+            b1, b2 = st.columns(2)
+            save = b1.form_submit_button("Save budget")
+            remove = b2.form_submit_button("Remove budget")
+        if save:
+            set_trip_budget(trip, total=total, categories=limits,
+                            start=start if use_dates else None, end=end if use_dates else None)
+            st.success(f"Budget saved for {trip}.")
+            st.rerun()
+        elif remove:
+            remove_trip_budget(trip)
+            st.success(f"Budget removed for {trip}.")
+            st.rerun()
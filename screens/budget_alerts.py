@@ -0,0 +1,13 @@
+# screens/budget_alerts.py
+# Overspend banners shared by the Journey Timeline and Analytics pages.
+import streamlit as st
+
+from budgets import alert_messages
+
+
+def render_alerts(report, limit=5):
+    alerts = alert_messages(report)
+    for level, text in alerts[:limit]:
+        (st.error if level == "error" else st.warning)("💸 " + text)
+    if len(alerts) > limit:
+        st.markdown(f"<div class='small-muted'>…and {len(alerts) - limit} more budget alerts on the Analytics page.</div>", unsafe_allow_html=True)
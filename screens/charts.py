@@ -0,0 +1,10 @@
+# screens/charts.py
+# st.plotly_chart with a timing span, so Plotly serialization shows up on the Settings page.
+import streamlit as st
+
+from instrumentation import span
+
+
+def show_chart(name, fig):
+    with span(f"chart.{name}.render"):
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,38 @@
+# screens/import_export.py
+import streamlit as st
+
+from bulk_io import filter_expenses, import_expenses, iter_csv
+from data_access import get_expenses_df
+
+
+def render():
+    st.subheader("Bulk Import & Export")
+    st.markdown("Upload a CSV or Excel file with columns `date, category, amount, location, description` "
+                "and optionally `trip_name, emoji`. Rows are checked with the same rules as the Add Expense form.")
+    import_file = st.file_uploader("Expenses file", type=["csv", "xlsx"])
+    dry_run = st.checkbox("Dry run (validate only, save nothing)", value=True)
+    if import_file is not None and st.button("Run Import"):
+        status = st.empty()
+        report = import_expenses(import_file, filename=import_file.name, dry_run=dry_run,
+                                 progress=lambda r: status.markdown(f"<div class='small-muted'>{r.summary()}</div>", unsafe_allow_html=True))
+        (st.info if dry_run else st.success)(report.summary())
+        if report.errors:
+            st.warning(f"{len(report.errors)} rows were rejected:")
+            st.dataframe(report.errors_frame(), height=300)
+
+    st.markdown("---")
+    st.markdown("### Export")
+    df = get_expenses_df()
+    if df.empty:
+        st.info("Nothing to export yet.")
+    else:
+        e1, e2 = st.columns(2)
+        with e1:
+            trips = st.multiselect("Trips", sorted(df['trip_name'].dropna().unique().tolist()))
+        with e2:
+            categories = st.multiselect("Categories", sorted(df['category'].dropna().unique().tolist()))
+        export_df = filter_expenses(df, trips=trips, categories=categories)
+        # the CSV is built only when the button is clicked, not on every rerun of this page
+        st.download_button(f"Download {len(export_df)} expenses (CSV)",
+                           data=lambda: "".join(iter_csv(export_df)).encode("utf-8"),
+                           file_name="expenses.csv", mime="text/csv")
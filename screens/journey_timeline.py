@@ -0,0 +1,153 @@
+# screens/journey_timeline.py
+import os
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from data_access import get_budget_report, get_view_frame
+from geocoding import attach_coordinates
+from instrumentation import span, traced
+from lod import bucket_timeline, chart_budget, cluster_points, top_labels
+from screens.budget_alerts import render_alerts
+from screens.charts import show_chart
+from thumbnails import thumbnail_for
+
+
+@traced("chart.timeline.build")
+def timeline_figure(events):
+    """Timeline scatter for bucketed events (see lod.bucket_timeline)."""
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=events['date'],
+        y=[1]*len(events),
+        mode='markers+text',
+        marker=dict(size=18, color='rgba(126,231,255,0.9)', line=dict(width=2, color='white')),
+        text=top_labels(events),
+        textposition="top center",
+        hovertemplate="<b>%{customdata[2]}</b><br>Date: %{x|%Y-%m-%d}<br>Category: %{customdata[0]}<br>Location: %{customdata[1]}<extra></extra>",
+        customdata=events[['category','location','label']].values
+    ))
+
+    fig.update_layout(
+        showlegend=False,
+        height=300,
+        xaxis=dict(title="Trip Timeline", showgrid=True),
+        yaxis=dict(visible=False),
+        margin=dict(l=40, r=40, t=30, b=30),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+@traced("chart.journey_map.build")
+def memories_map(plot_df, center, zoom):
+    """Clustered expense map (see lod.cluster_points) centred on center."""
+    fig = px.scatter_mapbox(plot_df,
+                            lat="latitude", lon="longitude",
+                            size="amount",
+                            color="category",
+                            hover_name="label",
+                            hover_data=["date","amount","count","description"],
+                            zoom=zoom,
+                            height=500)
+    fig.update_layout(mapbox_style="open-street-map",
+                      mapbox_center=center,
+                      margin={"r":0,"t":0,"l":0,"b":0})
+    return fig
+
+
+def render():
+    st.subheader("Journey Timeline — Relive your trips")
+    # sorted by date with `label` (emoji, trip or location, amount) already built, once per data version
+    df = get_view_frame()
+    if df.empty:
+        st.info("No trips yet. Add expenses with photos to see your Journey.")
+    else:
+        render_alerts(get_budget_report())
+        # timeline plot: events in the visible range are bucketed by day/week/month to stay within the point budget
+        dated = df.dropna(subset=['date'])
+        first_day, last_day = dated['date'].min().date(), dated['date'].max().date()
+        if first_day < last_day:
+            start, end = st.slider("Visible range", min_value=first_day, max_value=last_day, value=(first_day, last_day))
+            dated = dated[(dated['date'] >= pd.Timestamp(start)) & (dated['date'] < pd.Timestamp(end) + pd.Timedelta(days=1))]
+        events, unit = bucket_timeline(dated, chart_budget('timeline'))
+        if unit:
+            st.markdown(f"<div class='small-muted'>{len(dated)} expenses grouped by {unit}; labels show the top stories.</div>", unsafe_allow_html=True)
+        show_chart("timeline", timeline_figure(events))
+
+        st.markdown("---")
+        st.markdown("#### Trip Gallery")
+        # gallery of entries in chronological order, one page of thumbnails at a time
+        g1, g2 = st.columns([1,1])
+        with g1:
+            per_page = st.selectbox("Cards per page", [9, 18, 36], index=0)
+        n_pages = max(1, -(-len(df) // per_page))
+        with g2:
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=min(st.session_state.get('gallery_page', 1), n_pages), step=1)
+        st.session_state['gallery_page'] = page
+        st.markdown(f"<div class='small-muted'>Page {page} of {n_pages} · {len(df)} memories</div>", unsafe_allow_html=True)
+        # rows saved before their location was geocoded have no coordinates; take them from the cache
+        page_df = attach_coordinates(df.iloc[(page - 1) * per_page: page * per_page])
+
+        with span("section.timeline.gallery", cards=len(page_df)):
+            cols = st.columns(3)
+            for pos, row in enumerate(page_df.to_dict('records')):
+                c = cols[pos % 3]
+                with c:
+                    card = st.container()
+                    with card:
+                        st.markdown(f"<div class='trip-title'>{row['title']}</div>", unsafe_allow_html=True)
+                        st.markdown(f"<div class='small-muted'>{row['date'].date()} · ₹{row['amount']:.2f} · {row['category']}</div>", unsafe_allow_html=True)
+                        photo = row.get('photo_path')
+                        if isinstance(photo, str) and os.path.exists(photo):
+                            if st.session_state.get('full_photo_id') == row['id']:
+                                st.image(photo, use_column_width=True, caption=row.get('description',''), output_format='auto')
+                                if st.button("Show thumbnail", key=f"thumb_{row['id']}"):
+                                    st.session_state.pop('full_photo_id', None)
+                                    st.rerun()
+                            else:
+                                thumb = thumbnail_for(photo)
+                                if thumb:
+                                    st.image(thumb, use_column_width=True, caption=row.get('description',''))
+                                else:
+                                    st.markdown("<div class='small-muted'>🖼️ Preparing preview…</div>", unsafe_allow_html=True)
+                                if st.button("View full photo", key=f"full_{row['id']}"):
+                                    st.session_state['full_photo_id'] = row['id']
+                                    st.rerun()
+                        else:
+                            # placeholder
+                            st.write("📍 " + (row.get('location') or "Unknown location"))
+                            st.markdown(f"_{row.get('description','') or 'No description'}_")
+                        if st.button(f"Center on Map — ID {row['id']}", key=f"map_{row['id']}"):
+                            if pd.notna(row['latitude']) and pd.notna(row['longitude']):
+                                # store center info in session to be used below
+                                st.session_state['center_lat'] = float(row['latitude'])
+                                st.session_state['center_lon'] = float(row['longitude'])
+                                st.session_state['center_zoom'] = 6
+                            else:
+                                st.info("This location has not been placed on the map yet. Try again in a moment.")
+
+        # Map below
+        st.markdown("---")
+        st.markdown("### Map — Your Memories Around the World")
+        # coordinates come from the geocoding cache only; unseen locations are warmed in the background
+        with span("section.timeline.map_data"):
+            map_df = attach_coordinates(df).dropna(subset=['latitude','longitude'])
+        if map_df.empty:
+            st.info("Map will appear once you add at least one expense with a valid location.")
+        else:
+            # default center: mean coords
+            if pd.notna(st.session_state.get('center_lat')) and pd.notna(st.session_state.get('center_lon')):
+                center = {"lat": st.session_state['center_lat'], "lon": st.session_state['center_lon']}
+                zoom = st.session_state.get('center_zoom', 2)
+            else:
+                center = {"lat": map_df['latitude'].mean(), "lon": map_df['longitude'].mean()}
+                zoom = 2
+
+            # nearby points are merged into clusters once there are more than the map's point budget
+            plot_df = cluster_points(map_df, chart_budget('journey_map'))
+            show_chart("journey_map", memories_map(plot_df, center, zoom))
@@ -0,0 +1,43 @@
+# screens/search_box.py
+# Sidebar search over trips, locations and descriptions. Each hit can open
+# the edit form on View Expenses or center the Journey Timeline map on it.
+import pandas as pd
+import streamlit as st
+
+from data_access import search_expenses
+
+
+def _open_edit(expense_id):
+    st.session_state['menu'] = "View Expenses"
+    st.session_state['edit_id'] = expense_id
+    st.session_state.pop('edit_version', None)
+
+
+def _show_on_map(lat, lon):
+    st.session_state['menu'] = "Journey Timeline"
+    st.session_state['center_lat'] = lat
+    st.session_state['center_lon'] = lon
+    st.session_state['center_zoom'] = 8
+
+
+def render_search(limit=8):
+    query = st.sidebar.text_input("🔎 Search expenses", key="search_query",
+                                  placeholder="trip, place or note").strip()
+    if not query:
+        return
+    hits = search_expenses(query, limit=limit)
+    if not hits:
+        st.sidebar.markdown("<div class='small-muted'>No matches.</div>", unsafe_allow_html=True)
+        return
+    for hit in hits:
+        expense_id = int(hit['id'])
+        title = " · ".join(str(v) for v in (hit.get('trip_name'), hit.get('location')) if v and not pd.isna(v))
+        st.sidebar.markdown(f"**{hit.get('emoji') or ''} {title or 'Untitled'}**  \n"
+                            f"<span class='small-muted'>{hit.get('date')} · ₹{float(hit['amount']):.2f} · "
+                            f"{hit.get('description') or ''}</span>", unsafe_allow_html=True)
+        c1, c2 = st.sidebar.columns(2)
+        c1.button("Edit", key=f"search_edit_{expense_id}", on_click=_open_edit, args=(expense_id,))
+        lat, lon = hit.get('latitude'), hit.get('longitude')
+        if lat is not None and lon is not None and not pd.isna(lat) and not pd.isna(lon):
+            c2.button("Show on map", key=f"search_map_{expense_id}", on_click=_show_on_map,
+                      args=(float(lat), float(lon)))
@@ -0,0 +1,85 @@
+# screens/settings.py
+import os
+
+import pandas as pd
+import streamlit as st
+
+import instrumentation
+from data_access import cache_stats, photo_store_stats, search_stats, upload_dir, write_queue_stats
+
+
+def render():
+    st.subheader("Settings & Maintenance")
+    st.markdown("**Uploads folder path:** `" + os.path.abspath(upload_dir()) + "`")
+    if st.button("Clear All Session State"):
+        for k in list(st.session_state.keys()):
+            del st.session_state[k]
+        st.success("Session state cleared.")
+    stats = cache_stats()
+    st.markdown(f"**Expense cache:** {stats['cached_rows']} rows · version {stats['version']} · "
+                f"{stats['hits']} hits / {stats['misses']} misses · {stats['full_loads']} full loads · "
+                f"{stats['applied_changes']} incremental changes · {stats['stale_edits']} stale edits rejected")
+    derived = stats['derived']
+    st.markdown(f"**Shared derived frames:** {derived['entries']} cached · {derived['bytes'] / 1e6:,.1f} of "
+                f"{derived['max_bytes'] / 1e6:,.0f} MB · {derived['hits']} hits / {derived['misses']} misses · "
+                f"{derived['evictions']} evictions")
+    queue = write_queue_stats()
+    if queue is not None:
+        st.markdown(f"**Write-behind queue:** {queue['pending']} pending · {queue['written']} written in "
+                    f"{queue['flushed_batches']} batches · {queue['coalesced']} coalesced · {queue['retries']} retries")
+        if queue['last_error']:
+            st.warning(f"Last backend write failed, retrying: {queue['last_error']}")
+    index = search_stats()
+    st.markdown(f"**Search index:** {index['documents']} expenses · {index['terms']} distinct words · "
+                f"{index['rebuilds']} rebuilds / {index['loaded_from_disk']} loads from disk · "
+                f"{index['applied_changes']} incremental changes")
+    photos = photo_store_stats()
+    st.markdown(f"**Photo store:** {photos['files']} files for {photos['references']} attached photos · "
+                f"{photos['bytes'] / 1e6:,.1f} MB on disk · {photos['saved_bytes'] / 1e6:,.1f} MB saved by "
+                "deduplication and resizing")
+    st.markdown("**Note:** Photos are stored once per distinct image in the uploads folder and removed when the last "
+                "expense using them is deleted. Run `python media.py gc` to reclaim orphaned files.")
+
+    st.markdown("---")
+    render_instrumentation()
+
+
+def render_instrumentation():
+    st.markdown("#### Performance")
+    st.markdown(f"<div class='small-muted'>Timing spans from the last {instrumentation.BUFFER_SIZE} operations "
+                "in this server process (storage, geocoding, images, cache, page sections, charts).</div>",
+                unsafe_allow_html=True)
+    summary = instrumentation.summary()
+    if summary:
+        table = pd.DataFrame(summary).rename(columns={
+            "span": "Span", "count": "Calls", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)",
+            "max_ms": "Max (ms)", "total_ms": "Total (ms)"})
+        st.dataframe(table.style.format({c: "{:,.1f}" for c in ["p50 (ms)", "p95 (ms)", "Max (ms)", "Total (ms)"]}),
+                     use_container_width=True)
+        st.markdown("**Slowest recent operations**")
+        slow = pd.DataFrame([{
+            "Span": r["name"], "ms": r["ms"], "Inside": r["parent"] or "",
+            "When": pd.Timestamp(r["start"], unit="s").strftime("%H:%M:%S"),
+            "Details": ", ".join(f"{k}={v}" for k, v in (r.get("attrs") or {}).items()) + (f" error={r['error']}" if r.get("error") else ""),
+        } for r in instrumentation.slowest(10)])
+        st.dataframe(slow.style.format({"ms": "{:,.1f}"}), use_container_width=True)
+    else:
+        st.info("No spans recorded yet. Open a few pages and come back.")
+
+    c1, c2 = st.columns(2)
+    if c1.button("Profile the next rerun"):
+        # app.py runs the next page render under cProfile and leaves the report here
+        st.session_state['profile_next_run'] = True
+        st.success("The next page you open (or the next interaction) will be profiled.")
+    if c2.button("Clear spans"):
+        instrumentation.clear()
+        st.rerun()
+    profile = st.session_state.get('last_profile')
+    if profile and profile.get("text"):
+        with st.expander(f"cProfile of {profile.get('page', 'a page')} · {profile.get('captured_at', '')}"):
+            st.code(profile["text"])
+
+    export_on = st.checkbox(f"Export spans as JSON lines to {instrumentation.log_path()}",
+                            value=instrumentation.export_path() is not None)
+    if export_on != (instrumentation.export_path() is not None):
+        instrumentation.set_export(export_on)
@@ -0,0 +1,112 @@
+# screens/view_expenses.py
+import os
+
+import pandas as pd
+import streamlit as st
+
+from data_access import (
+    StaleEditError, UnresolvedIdError, delete_expense, get_expense, get_rollups, get_row_version, get_view_frame,
+    query_expenses, refresh_expenses, update_expense
+)
+from query import SORT_KEYS
+from thumbnails import thumbnail_for
+
+
+def render():
+    st.subheader("All Expenses — Table & Quick Actions")
+    df = get_view_frame()
+    if df.empty:
+        st.info("No expenses yet. Add one in the Add Expense section.")
+    else:
+        # ---- Filters ----
+        rollups = get_rollups()
+        with st.expander("Filters & sorting", expanded=False):
+            f1, f2, f3 = st.columns(3)
+            with f1:
+                date_range = st.date_input("Date range", value=())
+                location_q = st.text_input("Location contains")
+            with f2:
+                trips = st.multiselect("Trips", sorted(rollups.totals_by('trip_name')['trip_name']))
+                categories = st.multiselect("Categories", sorted(rollups.totals_by('category')['category']))
+            with f3:
+                min_amount = st.number_input("Min amount", min_value=0.0, value=0.0, step=100.0)
+                max_amount = st.number_input("Max amount (0 = no limit)", min_value=0.0, value=0.0, step=100.0)
+            s1, s2, s3 = st.columns(3)
+            with s1:
+                sort_by = st.selectbox("Sort by", SORT_KEYS)
+            with s2:
+                ascending = st.checkbox("Ascending", value=False)
+            with s3:
+                page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+        start = date_range[0] if len(date_range) > 0 else None
+        end = date_range[1] if len(date_range) > 1 else start
+        filters = dict(start=start, end=end, trips=trips, categories=categories, location=location_q.strip(),
+                       min_amount=min_amount or None, max_amount=max_amount or None)
+        _, total = query_expenses(limit=0, **filters)
+        n_pages = max(1, -(-total // page_size))
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+        page_df, total = query_expenses(sort_by=sort_by, ascending=ascending, offset=(page - 1) * page_size, limit=page_size, **filters)
+        st.markdown(f"<div class='small-muted'>{total} matching expenses · page {page} of {n_pages}</div>", unsafe_allow_html=True)
+        page_df = page_df[['id','date','trip_name','location','category','amount','emoji']].assign(date=page_df['date'].dt.date)
+        st.dataframe(page_df, height=400)
+
+        st.markdown("### Edit or Delete an Entry")
+        cols = st.columns([1,1,1])
+        with cols[0]:
+            selected_id = st.number_input("Enter ID to edit/delete", min_value=int(df['id'].min()), max_value=int(df['id'].max()), step=1, value=int(df['id'].max()))
+        with cols[1]:
+            if st.button("Load Entry"):
+                st.session_state['edit_id'] = selected_id
+                st.session_state.pop('edit_version', None)
+        with cols[2]:
+            if st.button("Refresh"):
+                refresh_expenses()
+                st.rerun()
+
+        if 'edit_id' in st.session_state:
+            entry = get_expense(st.session_state['edit_id'])
+            if entry is not None:
+                # the version this session is editing; a save against a newer row is rejected
+                if st.session_state.get('edit_version', (None,))[0] != entry['id']:
+                    st.session_state['edit_version'] = (entry['id'], get_row_version(entry['id']))
+                expected_version = st.session_state['edit_version'][1]
+                st.markdown(f"#### Editing ID {entry['id']} — {entry.get('trip_name','')}")
+                with st.form("edit_form"):
+                    date = st.date_input("Date", value=pd.to_datetime(entry['date']).date())
+                    trip_name = st.text_input("Trip name", value=entry.get('trip_name','') or "")
+                    category = st.selectbox("Category", ["Flight","Hotel","Food","Transport","Sightseeing","Other"], index=["Flight","Hotel","Food","Transport","Sightseeing","Other"].index(entry['category']) if entry['category'] in ["Flight","Hotel","Food","Transport","Sightseeing","Other"] else 5)
+                    amount = st.number_input("Amount", value=float(entry['amount']))
+                    location = st.text_input("Location", value=entry.get('location','') or "")
+                    emoji = st.text_input("Emoji", value=entry.get('emoji','') or "", max_chars=4)
+                    st.markdown(f"<h3 style='font-size:40px'>{emoji}</h3>", unsafe_allow_html=True)
+
+                    description = st.text_area("Description", value=entry.get('description','') or "")
+                    keep_photo = entry.get('photo_path', None)
+                    st.markdown("Current Photo:")
+                    if isinstance(keep_photo, str) and os.path.exists(keep_photo):
+                        st.image(thumbnail_for(keep_photo) or keep_photo, width=240)
+                    else:
+                        st.markdown("_No photo attached_")
+                    new_photo = st.file_uploader("Replace photo (optional)", type=["png","jpg","jpeg","webp"])
+                    update_btn = st.form_submit_button("Update")
+                    delete_btn = st.form_submit_button("Delete This Entry")
+                    try:
+                        if update_btn:
+                            update_expense(entry['id'], date, trip_name, category, amount, description, location, emoji, keep_photo, new_photo,
+                                           expected_version=expected_version)
+                            st.session_state.pop('edit_version', None)
+                            st.success("Updated successfully.")
+                            st.rerun()
+                        if delete_btn:
+                            delete_expense(entry['id'], expected_version=expected_version)
+                            st.session_state.pop('edit_version', None)
+                            st.success("Deleted entry.")
+                            st.rerun()
+                    except StaleEditError:
+                        st.error("Someone else changed this entry after you opened it, so your changes were not saved. "
+                                 "Click Load Entry to see the latest version and edit that.")
+                    except UnresolvedIdError:
+                        st.error("This entry is still being saved, so your changes were not saved. "
+                                 "Click Refresh and open it again.")
+            else:
+                st.warning("Entry not found. Please refresh or check ID.")
@@ -0,0 +1,282 @@
+# search.py
+# Full-text search over expense descriptions, trip names and locations.
+#
+# SearchIndex is a data_access cache observer: an inverted index (term ->
+# {expense id: field weight}) built once from the full frame and patched per
+# added, edited or deleted row. A query term matches exactly, as a prefix of
+# an indexed term (sorted vocabulary + bisect), or - for typos - through
+# trigram similarity against the vocabulary. Every query term has to match
+# (AND); results are ranked by summed field weight times match quality.
+#
+# The index is pickled to WANDERLOG_SEARCH_INDEX together with a fingerprint
+# of the rows it covers, so a restart reuses it instead of re-tokenizing
+# every expense; any mismatch with the loaded frame just rebuilds it.
+import bisect
+import os
+import pickle
+import re
+import threading
+
+import pandas as pd
+
+INDEX_PATH = os.environ.get("WANDERLOG_SEARCH_INDEX", "search_index.pkl")
+FORMAT_VERSION = 1
+FIELDS = ("trip_name", "location", "description")
+FIELD_WEIGHTS = {"trip_name": 3.0, "location": 2.0, "description": 1.0}
+PREFIX_SCORE = 0.8
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_SCORE = 0.6
+MAX_EXPANSIONS = 50   # vocabulary terms a single prefix/fuzzy query term may expand to
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    if text is None or (isinstance(text, float) and text != text):
+        return []
+    return _WORD.findall(str(text).casefold())
+
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _doc_text(row):
+    values = (row.get(f) for f in FIELDS)
+    return tuple("" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v) for v in values)
+
+
+def _hash_rows(frame):
+    """Order-independent hash of an (id, trip_name, location, description) string frame."""
+    if frame.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(frame, index=False).sum())
+
+
+def fingerprint(ids, texts):
+    frame = pd.DataFrame(texts, columns=list(FIELDS))
+    frame.insert(0, "id", pd.Series(ids, dtype="int64").astype(str).values)
+    return _hash_rows(frame)
+
+
+def frame_fingerprint(df):
+    """fingerprint() of an expense frame, without building per-row tuples."""
+    ids = pd.to_numeric(df['id'], errors='coerce')
+    keep = ids.notna().values
+    frame = pd.DataFrame({"id": ids[keep].astype("int64").astype(str).values})
+    for f in FIELDS:
+        frame[f] = df[f].values[keep] if f in df.columns else ""
+        frame[f] = frame[f].fillna("").astype(str)
+    return _hash_rows(frame)
+
+
+class SearchIndex:
+    """Inverted index with prefix and trigram (typo-tolerant) lookup."""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.stats = {"rebuilds": 0, "loaded_from_disk": 0, "applied_changes": 0}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.postings = {}      # term -> {id: weight}
+            self.docs = {}          # id -> (trip_name, location, description)
+            self.doc_terms = {}     # id -> {term: weight}
+            self.vocab = []         # sorted terms, for prefix lookups
+            self.trigram_terms = {}  # trigram -> set of terms
+            self.fingerprint = 0
+
+    # ----- maintenance -----
+    def rebuild(self, df):
+        with self._lock:
+            current = frame_fingerprint(df) if df is not None and not df.empty else 0
+            if self.docs and current == self.fingerprint:
+                return
+            if self._load(current):
+                return
+            self.reset()
+            if current:
+                ids = pd.to_numeric(df['id'], errors='coerce')
+                rows = df.assign(id=ids)[ids.notna()][['id', *FIELDS]].to_dict('records')
+                for row in rows:
+                    self._add(int(row['id']), _doc_text(row))
+                self.vocab = sorted(self.postings)
+            self.fingerprint = current
+            self.stats["rebuilds"] += 1
+            self._dirty = True
+        self.save_async()
+
+    def _add(self, doc_id, text, keep_vocab=False):
+        weights = {}
+        for field, value in zip(FIELDS, text):
+            for term in tokenize(value):
+                weights[term] = max(weights.get(term, 0.0), FIELD_WEIGHTS[field])
+        self.docs[doc_id] = text
+        self.doc_terms[doc_id] = weights
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                for tri in trigrams(term):
+                    self.trigram_terms.setdefault(tri, set()).add(term)
+                if keep_vocab:
+                    bisect.insort(self.vocab, term)
+            posting[doc_id] = weight
+
+    def _remove(self, doc_id):
+        weights = self.doc_terms.pop(doc_id, None)
+        self.docs.pop(doc_id, None)
+        for term in weights or ():
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+                for tri in trigrams(term):
+                    terms = self.trigram_terms.get(tri)
+                    if terms is not None:
+                        terms.discard(term)
+                        if not terms:
+                            del self.trigram_terms[tri]
+                pos = bisect.bisect_left(self.vocab, term)
+                if pos < len(self.vocab) and self.vocab[pos] == term:
+                    del self.vocab[pos]
+
+    def apply(self, old_row, new_row):
+        with self._lock:
+            if old_row is not None and old_row.get('id') is not None:
+                self._remove(int(old_row['id']))
+            if new_row is not None and new_row.get('id') is not None:
+                self._add(int(new_row['id']), _doc_text(new_row), keep_vocab=True)
+            self._dirty = True
+            self.stats["applied_changes"] += 1
+
+    def reassign(self, id_map):
+        """Move documents from temporary ids to the ids the backend assigned."""
+        with self._lock:
+            for old, new in id_map.items():
+                if old not in self.docs:
+                    continue
+                text = self.docs[old]
+                self._remove(old)
+                self._add(int(new), text, keep_vocab=True)
+            self._dirty = True
+
+    # ----- persistence -----
+    def _load(self, expected):
+        if not self.path or not expected or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        if state.get("version") != FORMAT_VERSION or state.get("fingerprint") != expected:
+            return False
+        self.postings, self.docs, self.doc_terms = state["postings"], state["docs"], state["doc_terms"]
+        self.vocab = sorted(self.postings)
+        self.trigram_terms = {}
+        for term in self.vocab:
+            for tri in trigrams(term):
+                self.trigram_terms.setdefault(tri, set()).add(term)
+        self.fingerprint = expected
+        self._dirty = False
+        self.stats["loaded_from_disk"] += 1
+        return True
+
+    def save(self):
+        """Write the index to disk if it changed since the last save."""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            ids = list(self.docs)
+            self.fingerprint = fingerprint(ids, [self.docs[i] for i in ids]) if ids else 0
+            # trigram sets are cheap to derive on load, so only the core maps are stored
+            blob = pickle.dumps({"version": FORMAT_VERSION, "fingerprint": self.fingerprint,
+                                 "postings": self.postings, "docs": self.docs, "doc_terms": self.doc_terms},
+                                protocol=pickle.HIGHEST_PROTOCOL)
+            self._dirty = False
+        tmp = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, self.path)
+        return True
+
+    def save_async(self):
+        threading.Thread(target=self.save, name="search-index-save", daemon=True).start()
+
+    # ----- queries -----
+    def _prefix_terms(self, prefix):
+        start = bisect.bisect_left(self.vocab, prefix)
+        out = []
+        for term in self.vocab[start:start + MAX_EXPANSIONS * 4]:
+            if not term.startswith(prefix):
+                break
+            if term != prefix:
+                out.append(term)
+        return out[:MAX_EXPANSIONS]
+
+    def _fuzzy_terms(self, token):
+        grams = trigrams(token)
+        shared = {}
+        for tri in grams:
+            for term in self.trigram_terms.get(tri, ()):
+                shared[term] = shared.get(term, 0) + 1
+        scored = []
+        for term, n in shared.items():
+            if term == token or abs(len(term) - len(token)) > 2:
+                continue
+            similarity = n / (len(grams) + len(trigrams(term)) - n)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                scored.append((similarity, term))
+        scored.sort(reverse=True)
+        return scored[:MAX_EXPANSIONS]
+
+    def _token_scores(self, token, prefix):
+        """{id: best score} for one query token."""
+        scores = {}
+
+        def merge(term, quality):
+            for doc_id, weight in self.postings.get(term, {}).items():
+                score = weight * quality
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+
+        merge(token, 1.0)
+        if prefix:
+            for term in self._prefix_terms(token):
+                merge(term, PREFIX_SCORE)
+        if len(token) >= 3 and len(scores) < 20:
+            for similarity, term in self._fuzzy_terms(token):
+                merge(term, FUZZY_SCORE * similarity)
+        return scores
+
+    def search(self, text, limit=10):
+        """[(id, score)] best first; every word in text must match (exactly, as a prefix, or fuzzily)."""
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+        with self._lock:
+            total = None
+            # rarest-looking (longest) tokens first keeps the running intersection small
+            for token in sorted(set(tokens), key=len, reverse=True):
+                scores = self._token_scores(token, prefix=True)
+                if total is None:
+                    total = scores
+                else:
+                    total = {d: s + scores[d] for d, s in total.items() if d in scores}
+                if not total:
+                    return []
+        ranked = sorted(total.items(), key=lambda kv: (-kv[1], -kv[0]))
+        return ranked[:limit]
+
+    def snapshot_stats(self):
+        with self._lock:
+            return dict(self.stats, documents=len(self.docs), terms=len(self.postings))
@@ -0,0 +1,284 @@
+# storage.py
+# Storage backends for the expense table.
+#
+# WANDERLOG_STORAGE picks the backend:
+#   "sheets" (default) - the Google Sheets store in functions.py (gspread)
+#   "sqlite"           - a local SQLite file, no network needed
+# Both expose the same small interface so data_access.py does not care which
+# one is in use.
+import os
+import sqlite3
+import threading
+from datetime import date as _date, datetime
+
+import pandas as pd
+
+from instrumentation import traced
+from media import get_store
+from thumbnails import remove_thumbnails
+
+STORAGE_BACKEND = os.environ.get("WANDERLOG_STORAGE", "sheets")
+SQLITE_PATH = os.environ.get("WANDERLOG_DB", "expenses.db")
+LOCAL_UPLOAD_DIR = os.environ.get("WANDERLOG_UPLOAD_DIR", "uploads")
+
+COLUMNS = ['id', 'date', 'trip_name', 'category', 'amount', 'location',
+           'description', 'emoji', 'photo_path', 'latitude', 'longitude']
+FIELDS = COLUMNS[1:]
+
+
+def empty_frame():
+    return pd.DataFrame(columns=COLUMNS)
+
+
+def _iso_date(value):
+    if isinstance(value, (datetime, _date)):
+        return value.strftime("%Y-%m-%d")
+    return str(value) if value is not None else None
+
+
+class StorageBackend:
+    """Interface every backend implements.
+
+    `add`/`update` return the stored row as a dict when the backend knows it,
+    or None when it cannot tell (the caller then reloads instead of patching);
+    `add_many` returns a list of those, or None.
+    """
+    name = "base"
+    upload_dir = LOCAL_UPLOAD_DIR
+
+    def load_df(self):
+        raise NotImplementedError
+
+    def add(self, record, photo=None):
+        raise NotImplementedError
+
+    def add_many(self, records):
+        return [self.add(record) for record in records]
+
+    def update(self, expense_id, record, keep_photo=None, new_photo=None):
+        raise NotImplementedError
+
+    def delete(self, expense_id):
+        raise NotImplementedError
+
+    @traced("image.save_photo")
+    def save_photo(self, uploaded_file):
+        """Store a Streamlit UploadedFile in the photo store and return its path.
+
+        Identical uploads share one file; every call takes a reference that
+        remove_photo gives back.
+        """
+        if uploaded_file is None:
+            return None
+        return get_store(self.upload_dir).put(uploaded_file)
+
+    def remove_photo(self, path):
+        """Release a photo reference; files from before the photo store are deleted outright."""
+        if not path or not isinstance(path, str):
+            return
+        store = get_store(self.upload_dir)
+        if store.owns(path):
+            store.release(path)
+        elif os.path.exists(path):
+            remove_thumbnails(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# ---------- Google Sheets (legacy functions.py) ----------
+class SheetsBackend(StorageBackend):
+    """Delegates to the gspread implementation in functions.py."""
+    name = "sheets"
+
+    def __init__(self):
+        import functions
+        self.functions = functions
+        self.upload_dir = getattr(functions, "UPLOAD_DIR", LOCAL_UPLOAD_DIR)
+
+    @traced("sheets.load_df")
+    def load_df(self):
+        return self.functions.get_expenses_df()
+
+    @traced("sheets.add")
+    def add(self, record, photo=None):
+        new_id = self.functions.add_expense(record['date'], record['category'], record['amount'],
+                                            record['location'], record['description'], record.get('emoji', ''))
+        if not isinstance(new_id, int):
+            # without the row's id there is nowhere to put the trip or photo; give back the photo reference
+            self.remove_photo(record.get('photo_path'))
+            return None
+        if record.get('trip_name') or record.get('photo_path') or photo is not None:
+            # functions.add_expense has no trip or photo columns; update_expense fills them in
+            record = dict(record, trip_name=record.get('trip_name') or '')
+            return self.update(new_id, record, keep_photo=record.get('photo_path'), new_photo=photo)
+        return dict(record, id=new_id)
+
+    @traced("sheets.update")
+    def update(self, expense_id, record, keep_photo=None, new_photo=None):
+        self.functions.update_expense(expense_id, record['date'], record['trip_name'], record['category'],
+                                      record['amount'], record['description'], record['location'],
+                                      record['emoji'], keep_photo, new_photo)
+        if new_photo is not None:
+            # the row no longer points at the old photo
+            self.remove_photo(keep_photo)
+            return None
+        return dict(record, id=expense_id, photo_path=keep_photo)
+
+    @traced("sheets.add_many")
+    def add_many(self, records):
+        # one append per batch when functions.py provides it, otherwise row by row
+        bulk = getattr(self.functions, "add_expenses_bulk", None)
+        if bulk is None:
+            return super().add_many(records)
+        bulk(records)
+        return None
+
+    @traced("sheets.delete")
+    def delete(self, expense_id):
+        # look the photo up first: once the row is gone nothing says which reference to give back
+        df = self.load_df()
+        row = df[pd.to_numeric(df['id'], errors='coerce') == int(expense_id)]
+        self.functions.delete_expense(expense_id)
+        for path in row.get('photo_path', []):
+            self.remove_photo(path)
+
+
+# ---------- Local SQLite ----------
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH, upload_dir=LOCAL_UPLOAD_DIR):
+        self.path = path
+        self.upload_dir = upload_dir
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS expenses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT, trip_name TEXT, category TEXT, amount REAL,
+                    location TEXT, description TEXT, emoji TEXT, photo_path TEXT,
+                    latitude REAL, longitude REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
+                CREATE INDEX IF NOT EXISTS idx_expenses_trip ON expenses(trip_name);
+                CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category);
+                CREATE INDEX IF NOT EXISTS idx_expenses_location ON expenses(location);
+            """)
+
+    @traced("sqlite.load_df")
+    def load_df(self):
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM expenses ORDER BY id", self._conn)
+        return df
+
+    def _values(self, record):
+        record = dict(record)
+        record['date'] = _iso_date(record.get('date'))
+        return [record.get(col) for col in FIELDS]
+
+    @traced("sqlite.add")
+    def add(self, record, photo=None):
+        record = dict(record)
+        if photo is not None:
+            record['photo_path'] = self.save_photo(photo)
+        marks = ", ".join("?" * len(FIELDS))
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                f"INSERT INTO expenses ({', '.join(FIELDS)}) VALUES ({marks})", self._values(record))
+            record['id'] = cur.lastrowid
+        record['date'] = _iso_date(record.get('date'))
+        return record
+
+    @traced("sqlite.add_many")
+    def add_many(self, records):
+        records = [dict(r) for r in records]
+        marks = ", ".join("?" * len(FIELDS))
+        sql = f"INSERT INTO expenses ({', '.join(FIELDS)}) VALUES ({marks})"
+        # one transaction for the whole batch; lastrowid per row gives us the ids
+        with self._lock, self._conn:
+            for record in records:
+                record['id'] = self._conn.execute(sql, self._values(record)).lastrowid
+                record['date'] = _iso_date(record.get('date'))
+        return records
+
+    @traced("sqlite.update")
+    def update(self, expense_id, record, keep_photo=None, new_photo=None):
+        record = dict(record)
+        record['photo_path'] = keep_photo
+        if new_photo is not None:
+            record['photo_path'] = self.save_photo(new_photo)
+        sets = ", ".join(f"{col} = ?" for col in FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE expenses SET {sets} WHERE id = ?",
+                               self._values(record) + [int(expense_id)])
+        if new_photo is not None and keep_photo:
+            # re-uploading the same photo took a second reference to it; this gives one back
+            self.remove_photo(keep_photo)
+        record['id'] = int(expense_id)
+        record['date'] = _iso_date(record.get('date'))
+        return record
+
+    @traced("sqlite.delete")
+    def delete(self, expense_id):
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT photo_path FROM expenses WHERE id = ?", (int(expense_id),)).fetchone()
+            self._conn.execute("DELETE FROM expenses WHERE id = ?", (int(expense_id),))
+        if row:
+            self.remove_photo(row[0])
+
+
+BACKENDS = {"sheets": SheetsBackend, "sqlite": SQLiteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if STORAGE_BACKEND not in BACKENDS:
+                raise ValueError(f"Unknown WANDERLOG_STORAGE '{STORAGE_BACKEND}', expected one of {sorted(BACKENDS)}")
+            _backend = BACKENDS[STORAGE_BACKEND]()
+        return _backend
+
+
+def set_backend(backend):
+    """Use a specific backend instance (tests, benchmarks, one-off scripts)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# ---------- Snapshots ----------
+def export_parquet(path, backend=None):
+    """Write the whole expense table to a Parquet file (needs pyarrow or fastparquet)."""
+    df = (backend or get_backend()).load_df()
+    df.to_parquet(path, index=False)
+    return len(df)
+
+
+def copy_backend(source, target):
+    """Copy every row from one backend into another, e.g. Sheets -> SQLite."""
+    df = source.load_df()
+    records = [{col: row.get(col) for col in FIELDS} for row in df.to_dict("records")]
+    return len(target.add_many(records))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Expense storage maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export-parquet", help="snapshot the configured backend to Parquet")
+    export.add_argument("path")
+    sub.add_parser("import-sheets", help="copy the Google Sheet into the local SQLite store")
+    args = parser.parse_args()
+
+    if args.command == "export-parquet":
+        print(f"exported {export_parquet(args.path)} rows to {args.path}")
+    elif args.command == "import-sheets":
+        print(f"copied {copy_backend(SheetsBackend(), SQLiteBackend())} rows into {SQLITE_PATH}")
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# data_access reads these at import: saves go straight to the test backend and nothing lands in the repo
+os.environ.setdefault("WANDERLOG_WRITE_BEHIND", "0")
+os.environ.setdefault("WANDERLOG_SEARCH_INDEX", "")
+os.environ.setdefault("WANDERLOG_BUDGETS", os.path.join(tempfile.gettempdir(), "wanderlog_test_budgets.json"))
+os.environ.setdefault("WANDERLOG_GEOCODE_DB", os.path.join(tempfile.gettempdir(), "wanderlog_test_geocode.db"))
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from budgets import TripLedger
+
+
+def row(expense_id, category, amount):
+    return {'id': expense_id, 'date': '2024-03-01', 'trip_name': 'Goa Trip', 'category': category,
+            'amount': amount, 'location': 'Goa', 'description': 'x'}
+
+
+def test_missing_category_uses_one_bucket_for_rebuild_and_edits():
+    rows = [row(1, np.nan, 100.0), row(2, 'Food', 50.0)]
+    ledger = TripLedger()
+    ledger.rebuild(pd.DataFrame(rows))
+    assert ledger.category_spend('Goa Trip') == {'': 100.0, 'Food': 50.0}
+
+    # the edit reaches the cache as a row dict, where the missing category is a float NaN
+    ledger.apply(rows[0], dict(rows[0], category='Food'))
+    assert ledger.category_spend('Goa Trip') == {'Food': 150.0}
+    ledger.apply(dict(rows[0], category='Food'), None)
+    assert ledger.category_spend('Goa Trip') == {'Food': 50.0}
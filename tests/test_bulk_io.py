@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from bulk_io import import_expenses
+
+HEADER = ['date', 'category', 'amount', 'location', 'description']
+GOOD = ['2024-03-01', 'Food', '120', 'Goa', 'fish thali']
+BAD = ['2024-03-02', 'Food', 'lots', 'Goa', 'prawn curry']
+
+
+def xlsx(rows):
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    for row in rows:
+        wb.active.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def test_xlsx_error_lines_count_blank_rows():
+    # sheet rows: 1 header, 2 good, 3 blank, 4 good, 5 bad, 6 blank, 7 bad (the 3rd kept row starts chunk 2)
+    source = xlsx([HEADER, GOOD, [None] * 5, GOOD, BAD, [None] * 5, BAD])
+    report = import_expenses(source, filename="expenses.xlsx", dry_run=True, chunksize=2)
+    assert [line for line, _ in report.errors] == [5, 7]
+    assert (report.rows, report.valid) == (4, 2)
+
+
+def test_csv_error_lines_count_blank_lines():
+    text = "\n".join([",".join(HEADER), ",".join(GOOD), "", ",".join(BAD), "", "", ",".join(BAD)]) + "\n"
+    report = import_expenses(io.StringIO(text), filename="expenses.csv", dry_run=True, chunksize=2)
+    assert [line for line, _ in report.errors] == [4, 7]
+    assert (report.rows, report.valid) == (3, 1)
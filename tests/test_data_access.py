@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+import data_access
+import geocoding
+from data_access import (DerivedCache, ExpenseCache, StaleEditError, add_expense, delete_expense,
+                         get_row_version, update_expense)
+from geocoding import GazetteerProvider, GeocodeCache
+from storage import SQLiteBackend, set_backend
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    backend = SQLiteBackend(path=str(tmp_path / "expenses.db"), upload_dir=str(tmp_path / "uploads"))
+    set_backend(backend)
+    monkeypatch.setattr(data_access, "_cache", ExpenseCache(data_access._load_from_store))
+    # an empty gazetteer: saves never reach the network
+    monkeypatch.setattr(geocoding, "_cache", GeocodeCache(str(tmp_path / "geocode.db")))
+    monkeypatch.setattr(geocoding, "_provider", GazetteerProvider(str(tmp_path / "none.csv")))
+    yield backend
+    set_backend(None)
+
+
+def add(description="fish thali"):
+    return add_expense('2024-03-01', 'Food', 120.0, 'Goa', description, trip_name='Goa Trip')
+
+
+def edit(expense_id, description, expected_version=None):
+    update_expense(expense_id, '2024-03-01', 'Goa Trip', 'Food', 120.0, description, 'Goa', '',
+                   expected_version=expected_version)
+
+
+# ---------- row versions ----------
+def test_version_increments_after_update(backend):
+    expense_id = add()
+    assert get_row_version(expense_id) == 0
+    edit(expense_id, 'prawn curry', expected_version=0)
+    assert get_row_version(expense_id) == 1
+    assert data_access.get_expense(expense_id)['description'] == 'prawn curry'
+
+
+def test_edit_with_stale_version_is_rejected(backend):
+    expense_id = add()
+    opened = get_row_version(expense_id)
+    edit(expense_id, 'prawn curry', expected_version=opened)       # another session saves first
+    with pytest.raises(StaleEditError) as err:
+        edit(expense_id, 'crab masala', expected_version=opened)
+    assert (err.value.expected, err.value.current) == (0, 1)
+    assert backend.load_df()['description'].tolist() == ['prawn curry']
+    with pytest.raises(StaleEditError):
+        delete_expense(expense_id, expected_version=opened)
+    assert len(backend.load_df()) == 1
+
+
+def test_delete_moves_the_version_on(backend):
+    expense_id = add()
+    delete_expense(expense_id, expected_version=0)
+    assert get_row_version(expense_id) is None
+    with pytest.raises(StaleEditError) as err:
+        edit(expense_id, 'prawn curry', expected_version=0)
+    assert err.value.current is None
+
+
+def test_rows_changed_elsewhere_get_a_new_version_on_reload(backend):
+    changed, untouched = add('a'), add('b')
+    get_row_version(changed)
+    backend.update(changed, dict(backend.load_df().iloc[0].to_dict(), description='edited in the store'))
+    data_access._cache.invalidate()
+    assert (get_row_version(changed), get_row_version(untouched)) == (1, 0)
+
+
+# ---------- derived frames ----------
+def frame(rows):
+    return pd.DataFrame({'n': range(rows)})
+
+
+def test_derived_cache_evicts_least_recently_used_at_capacity():
+    size = data_access._frame_bytes(frame(100))
+    cache = DerivedCache(max_bytes=2 * size)
+    builds = []
+
+    def build(key):
+        builds.append(key)
+        return frame(100)
+
+    for key in ('a', 'b', 'a', 'c'):     # 'a' was used after 'b', so 'b' goes when 'c' arrives
+        cache.get(1, key, lambda: build(key))
+    assert builds == ['a', 'b', 'c']
+    assert cache.snapshot_stats()['evictions'] == 1
+    assert cache.snapshot_stats()['bytes'] <= cache.max_bytes
+
+    cache.get(1, 'a', lambda: build('a'))
+    cache.get(1, 'b', lambda: build('b'))
+    assert builds == ['a', 'b', 'c', 'b']
+
+
+def test_derived_cache_drops_entries_from_older_versions():
+    cache = DerivedCache(max_bytes=10 ** 9)
+    cache.get(1, 'view', lambda: frame(10))
+    rebuilt = cache.get(2, 'view', lambda: frame(20))
+    assert len(rebuilt) == 20
+    assert cache.snapshot_stats()['entries'] == 1
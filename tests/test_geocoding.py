@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+import geocoding
+from geocoding import GazetteerProvider, GeocodeCache, attach_coordinates, geocode_many
+
+
+@pytest.fixture
+def gazetteer(tmp_path, monkeypatch):
+    path = tmp_path / "gazetteer.csv"
+    path.write_text("location,latitude,longitude\nGoa,15.3,74.1\nJaipur,26.9,75.8\n", encoding="utf-8")
+    monkeypatch.setattr(geocoding, "_cache", GeocodeCache(str(tmp_path / "geocode.db")))
+    monkeypatch.setattr(geocoding, "_provider", GazetteerProvider(str(path)))
+    geocode_many(["Goa", "Jaipur"])
+    yield
+    geocoding._cache.close()
+
+
+def test_attach_coordinates_fills_blank_and_missing_cells(gazetteer):
+    # Sheets returns "" for an empty cell, SQLite returns None
+    df = pd.DataFrame({'location': [" goa ", "Jaipur", "Atlantis", "Goa"],
+                       'latitude': ["", None, "", "1.5"], 'longitude': ["", None, None, "2.5"]})
+    out = attach_coordinates(df, warm_missing=False)
+    assert out['latitude'].dtype == "float64"
+    assert out['latitude'].tolist()[:2] == [15.3, 26.9]
+    assert out['longitude'].tolist()[:2] == [74.1, 75.8]
+    assert out.loc[2, ['latitude', 'longitude']].isna().all()
+    # coordinates already on the row win over the cache
+    assert out.loc[3, ['latitude', 'longitude']].tolist() == [1.5, 2.5]
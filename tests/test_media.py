@@ -0,0 +1,82 @@
+import io
+import os
+
+from PIL import Image
+
+from media import MediaStore, encode_photo
+from storage import SQLiteBackend
+
+
+def photo(color, size=32):
+    buf = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(buf, format="PNG")
+    buf.name = f"{color}.png"
+    buf.seek(0)
+    return buf
+
+
+def record(description, photo_path=None):
+    return {'date': '2024-03-01', 'trip_name': 'Goa Trip', 'category': 'Food', 'amount': 100.0,
+            'location': 'Goa', 'description': description, 'emoji': '', 'photo_path': photo_path,
+            'latitude': None, 'longitude': None}
+
+
+def make_backend(tmp_path):
+    return SQLiteBackend(path=str(tmp_path / "expenses.db"), upload_dir=str(tmp_path / "uploads"))
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    store = MediaStore(str(tmp_path))
+    first, second = store.put(photo("red")), store.put(photo("red"))
+    assert first == second
+    assert store.stats()['files'] == 1
+    assert store.stats()['references'] == 2
+
+
+def test_deleting_one_of_two_rows_sharing_a_photo_keeps_it(tmp_path):
+    backend = make_backend(tmp_path)
+    rows = [backend.add(record(d), photo=photo("red")) for d in ('a', 'b')]
+    path = rows[0]['photo_path']
+    assert rows[1]['photo_path'] == path
+
+    backend.delete(rows[0]['id'])
+    assert os.path.exists(path)
+    backend.delete(rows[1]['id'])
+    assert not os.path.exists(path)
+
+
+def test_replacing_a_photo_releases_the_old_one(tmp_path):
+    backend = make_backend(tmp_path)
+    row = backend.add(record('a'), photo=photo("red"))
+    old = row['photo_path']
+    new = backend.update(row['id'], record('a'), keep_photo=old, new_photo=photo("blue"))['photo_path']
+    assert not os.path.exists(old)
+    # re-attaching the photo the row already has nets out to one reference
+    again = backend.update(row['id'], record('a'), keep_photo=new, new_photo=photo("blue"))['photo_path']
+    assert again == new
+    backend.delete(row['id'])
+    assert not os.path.exists(new)
+
+
+def test_large_photos_are_downscaled():
+    data = photo("green", size=300).getvalue()
+    encoded, ext = encode_photo(data, "big.png", max_px=100)
+    with Image.open(io.BytesIO(encoded)) as img:
+        assert max(img.size) == 100
+    assert ext == ".jpg"
+
+
+def test_gc_resets_refcounts_and_removes_orphans(tmp_path):
+    store = MediaStore(str(tmp_path))
+    kept = store.put(photo("red"))
+    store.put(photo("red"))                  # a reference nothing points at any more
+    orphan = store.put(photo("blue"))
+    loose = tmp_path / "old_upload.png"
+    loose.write_bytes(photo("green").getvalue())
+
+    report = store.gc([kept])
+    assert report['removed'] == 2
+    assert report['fixed_refs'] == 2
+    assert os.path.exists(kept)
+    assert not os.path.exists(orphan) and not loose.exists()
+    assert store.stats()['references'] == 1
@@ -0,0 +1,69 @@
+import pandas as pd
+
+from search import SearchIndex
+
+
+def frame(rows):
+    return pd.DataFrame([{'id': i, 'trip_name': trip, 'location': loc, 'description': desc}
+                         for i, (trip, loc, desc) in enumerate(rows, start=1)])
+
+
+ROWS = [('Goa Trip', 'Panaji', 'fish thali at the beach shack'),
+        ('Jaipur Trip', 'Jaipur', 'amber fort tickets'),
+        ('Goa Trip', 'Calangute', 'parasailing')]
+
+
+def index(tmp_path=None):
+    idx = SearchIndex(path=str(tmp_path / "index.pkl") if tmp_path else None)
+    idx.rebuild(frame(ROWS))
+    return idx
+
+
+def ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def test_exact_words_must_all_match():
+    idx = index()
+    assert sorted(ids(idx.search("goa"))) == [1, 3]
+    assert ids(idx.search("goa fish")) == [1]
+    assert idx.search("goa fort") == []
+
+
+def test_prefix_matches_rank_below_exact_ones():
+    idx = index()
+    assert ids(idx.search("jaip")) == [2]
+    exact, = idx.search("jaipur")
+    prefix, = idx.search("jaip")
+    assert prefix[1] < exact[1]
+
+
+def test_typos_match_through_trigrams():
+    idx = index()
+    assert ids(idx.search("parasaling")) == [3]
+    assert idx.search("parasaling beach") == []   # every word has to match the same expense
+
+
+def test_apply_and_reassign_keep_the_index_in_step():
+    idx = index()
+    idx.apply(None, {'id': -1, 'trip_name': 'Kerala Trip', 'location': 'Munnar', 'description': 'tea estate'})
+    assert ids(idx.search("munnar")) == [-1]
+    idx.reassign({-1: 4})
+    assert ids(idx.search("munnar")) == [4]
+    idx.apply({'id': 4}, {'id': 4, 'trip_name': 'Kerala Trip', 'location': 'Alleppey', 'description': 'houseboat'})
+    assert idx.search("munnar") == []
+    assert ids(idx.search("houseboat")) == [4]
+    idx.apply({'id': 2}, None)
+    assert idx.search("amber") == []
+
+
+def test_saved_index_is_reused_for_the_same_rows(tmp_path):
+    idx = index(tmp_path)
+    idx.save()
+    again = SearchIndex(path=idx.path)
+    again.rebuild(frame(ROWS))
+    assert again.snapshot_stats()['loaded_from_disk'] == 1
+    assert ids(again.search("thali")) == [1]
+    changed = SearchIndex(path=idx.path)
+    changed.rebuild(frame(ROWS[:2]))
+    assert changed.snapshot_stats()['loaded_from_disk'] == 0
@@ -0,0 +1,58 @@
+import io
+import os
+
+from PIL import Image
+
+from benchmarks.synthetic import OfflineSheetsBackend
+
+
+def record(description, photo_path=None, trip_name='Goa Trip'):
+    return {'date': '2024-03-01', 'trip_name': trip_name, 'category': 'Food', 'amount': 100.0,
+            'location': 'Goa', 'description': description, 'emoji': '', 'photo_path': photo_path,
+            'latitude': None, 'longitude': None}
+
+
+def photo(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buf, format="PNG")
+    buf.name = f"{color}.png"
+    buf.seek(0)
+    return buf
+
+
+def stored_ids(backend):
+    return sorted(int(i) for i in backend.load_df()['id'])
+
+
+def test_sheets_delete_releases_the_photo(tmp_path):
+    backend = OfflineSheetsBackend(upload_dir=str(tmp_path))
+    shared = backend.save_photo(photo("red"))
+    assert backend.save_photo(photo("red")) == shared
+    # the stand-in only stores photo paths through update_expense, like functions.py
+    first, second = (backend.functions.add_expense('2024-03-01', 'Food', 100.0, 'Goa', d) for d in ('a', 'b'))
+    for expense_id in (first, second):
+        backend.update(expense_id, record('x'), keep_photo=shared)
+
+    backend.delete(first)
+    assert os.path.exists(shared)
+    backend.delete(second)
+    assert not os.path.exists(shared)
+    assert stored_ids(backend) == []
+
+
+def test_sheets_add_stores_trip_and_photo(tmp_path):
+    backend = OfflineSheetsBackend(upload_dir=str(tmp_path))
+    path = backend.save_photo(photo("blue"))
+    stored = backend.add(record('fish thali', photo_path=path))
+    row = backend.load_df().iloc[0].to_dict()
+    assert (stored['id'], stored['trip_name'], stored['photo_path']) == (row['id'], 'Goa Trip', path)
+    assert (row['trip_name'], row['photo_path']) == ('Goa Trip', path)
+
+
+def test_sheets_add_without_an_id_gives_back_the_photo(tmp_path):
+    backend = OfflineSheetsBackend(upload_dir=str(tmp_path))
+    append = backend.functions.add_expense
+    backend.functions.add_expense = lambda *args: append(*args) and None
+    path = backend.save_photo(photo("green"))
+    assert backend.add(record('fish thali', photo_path=path)) is None
+    assert not os.path.exists(path)
@@ -0,0 +1,210 @@
+import io
+
+import pytest
+from PIL import Image
+
+import write_behind
+from media import get_store
+from storage import SQLiteBackend
+from write_behind import UnresolvedIdError, WriteBehindQueue, coalesce
+
+
+def record(description, photo_path=None, amount=100.0):
+    return {'date': '2024-03-01', 'trip_name': 'Goa Trip', 'category': 'Food', 'amount': amount,
+            'location': 'Goa', 'description': description, 'emoji': '', 'photo_path': photo_path,
+            'latitude': None, 'longitude': None}
+
+
+def photo(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buf, format="PNG")
+    buf.name = f"{color}.png"
+    buf.seek(0)
+    return buf
+
+
+class FlakyBackend(SQLiteBackend):
+    """SQLiteBackend whose chosen methods raise the first time they are called."""
+
+    def __init__(self, *args, fail=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = set(fail)
+        self.calls = []
+
+    def _maybe_fail(self, name):
+        self.calls.append(name)
+        if name in self.fail:
+            self.fail.discard(name)
+            raise ConnectionError(f"{name} failed")
+
+    def update(self, *args, **kwargs):
+        self._maybe_fail("update")
+        return super().update(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._maybe_fail("delete")
+        return super().delete(*args, **kwargs)
+
+
+class NoIdsBackend(SQLiteBackend):
+    """Stores rows like the Sheets bulk append: without telling which ids they got."""
+
+    def add_many(self, records):
+        super().add_many(records)
+        return None
+
+
+@pytest.fixture
+def make_backend(tmp_path):
+    def make(cls=SQLiteBackend, **kwargs):
+        return cls(path=str(tmp_path / "expenses.db"), upload_dir=str(tmp_path / "uploads"), **kwargs)
+    return make
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    def make(backend):
+        # a long flush delay keeps the background thread out of the way; tests call flush() themselves
+        return WriteBehindQueue(lambda: backend, journal_path=str(tmp_path / "mutations.journal"),
+                                flush_delay=3600)
+    return make
+
+
+def descriptions(backend):
+    return sorted(backend.load_df()['description'])
+
+
+# ---------- coalesce ----------
+def test_coalesce_folds_updates_into_add():
+    nets = coalesce([
+        {'seq': 1, 'op': 'add', 'id': -1, 'record': record('a')},
+        {'seq': 2, 'op': 'update', 'id': -1, 'record': record('b'), 'old_photo': 'p1'},
+    ])
+    assert [(n['op'], n['record']['description'], n['old_photos'], n['seqs']) for n in nets] == \
+        [('add', 'b', ['p1'], [1, 2])]
+
+
+def test_coalesce_keeps_every_replaced_photo():
+    nets = coalesce([
+        {'seq': 1, 'op': 'update', 'id': 5, 'record': record('a'), 'old_photo': 'p1'},
+        {'seq': 2, 'op': 'update', 'id': 5, 'record': record('b'), 'old_photo': 'p2'},
+        {'seq': 3, 'op': 'delete', 'id': 5, 'record': None},
+    ])
+    assert [(n['op'], n['old_photos']) for n in nets] == [('delete', ['p1', 'p2'])]
+
+
+def test_coalesce_add_then_delete_still_releases_photos():
+    nets = coalesce([
+        {'seq': 1, 'op': 'add', 'id': -1, 'record': record('a', photo_path='p1')},
+        {'seq': 2, 'op': 'update', 'id': -1, 'record': record('a', photo_path='p2'), 'old_photo': 'p1'},
+        {'seq': 3, 'op': 'delete', 'id': -1, 'record': None},
+    ])
+    assert [(n['op'], n['old_photos']) for n in nets] == [('release', ['p1', 'p2'])]
+
+
+# ---------- retries ----------
+def test_retry_after_failed_update_does_not_add_twice(make_backend, make_queue):
+    backend = make_backend(FlakyBackend, fail={"update"})
+    existing = backend.add(record('existing'))
+    queue = make_queue(backend)
+    queue.enqueue("add", queue.new_temp_id(), record('new'))
+    queue.enqueue("update", existing['id'], record('edited'))
+
+    with pytest.raises(ConnectionError):
+        queue.flush()
+    queue.flush()
+
+    assert descriptions(backend) == ['edited', 'new']
+    assert queue.snapshot_stats()['pending'] == 0
+
+
+def test_retry_does_not_release_a_shared_photo_twice(make_backend, make_queue):
+    backend = make_backend(FlakyBackend, fail={"delete"})
+    shared = backend.save_photo(photo("red"))
+    backend.save_photo(photo("red"))        # a second expense uses the same photo
+    first = backend.add(record('first', photo_path=shared))
+    backend.add(record('second', photo_path=shared))
+    doomed = backend.add(record('doomed'))
+    replacement = backend.save_photo(photo("blue"))
+    queue = make_queue(backend)
+    queue.enqueue("update", first['id'], record('first', photo_path=replacement), old_photo=shared)
+    queue.enqueue("delete", doomed['id'])
+
+    with pytest.raises(ConnectionError):
+        queue.flush()
+    queue.flush()
+
+    store = get_store(backend.upload_dir)
+    assert store.stats()['references'] == 2
+    assert store.owns(shared) and store.release(shared) == 0   # exactly one reference was left
+
+
+def test_restart_resumes_a_half_written_batch(make_backend, make_queue):
+    backend = make_backend(FlakyBackend, fail={"update"})
+    existing = backend.add(record('existing'))
+    queue = make_queue(backend)
+    queue.enqueue("add", queue.new_temp_id(), record('new'))
+    queue.enqueue("update", existing['id'], record('edited'))
+    with pytest.raises(ConnectionError):
+        queue.flush()
+
+    restarted = make_queue(backend)     # same journal, as after a crash
+    assert restarted.stats['replayed'] == 2
+    restarted.flush()
+
+    assert descriptions(backend) == ['edited', 'new']
+    assert backend.calls.count("update") == 2
+
+
+def test_add_then_delete_before_flush_releases_its_photos(make_backend, make_queue):
+    backend = make_backend()
+    first, second = backend.save_photo(photo("red")), backend.save_photo(photo("green"))
+    queue = make_queue(backend)
+    temp = queue.new_temp_id()
+    queue.enqueue("add", temp, record('gone', photo_path=first))
+    queue.enqueue("update", temp, record('gone', photo_path=second), old_photo=first)
+    queue.enqueue("delete", temp)
+    queue.flush()
+
+    assert descriptions(backend) == []
+    assert get_store(backend.upload_dir).stats()['files'] == 0
+
+
+# ---------- backends that do not report ids ----------
+def test_rows_added_without_ids_are_found_and_stay_editable(make_backend, make_queue):
+    backend = make_backend(NoIdsBackend)
+    backend.add(record('lunch'))            # an identical older row must not be picked
+    queue = make_queue(backend)
+    flushed = []
+    queue.on_flushed = flushed.append
+    temp = queue.new_temp_id()
+    queue.enqueue("add", temp, record('lunch'))
+    queue.flush()
+
+    # the backend never said what it stored, so the cache has to reload
+    assert flushed == [None]
+    real = queue.resolve(temp)
+    assert real == int(backend.load_df()['id'].max())
+    queue.enqueue("update", real, record('dinner'))
+    queue.flush()
+    assert descriptions(backend) == ['dinner', 'lunch']
+
+
+def test_edits_of_unidentified_rows_are_held_not_dropped(make_backend, make_queue, monkeypatch):
+    class Unfindable(NoIdsBackend):
+        def load_df(self):
+            return super().load_df().iloc[0:0]
+
+    monkeypatch.setattr(write_behind, "MAX_BATCH", 1)
+    backend = make_backend(Unfindable)
+    queue = make_queue(backend)
+    temp = queue.new_temp_id()
+    queue.enqueue("add", temp, record('a'))
+    queue.enqueue("update", temp, record('b'))   # queued before the add was written
+    queue.flush()
+    queue.flush()
+
+    assert queue.snapshot_stats()['held'] == 1
+    with pytest.raises(UnresolvedIdError):
+        queue.enqueue("delete", temp)
+    assert make_queue(backend).stats['replayed'] == 1   # still in the journal
@@ -0,0 +1,107 @@
+# thumbnails.py
+# Small WebP previews of uploaded photos, stored next to the originals.
+#
+# `photo.jpg` gets `photo.thumb.webp`. Thumbnails are produced on a small
+# worker pool so saving an expense never waits on image resizing; the Trip
+# Gallery shows thumbnails and only loads an original when asked to.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import traced
+
+THUMB_SIZE = int(os.environ.get("WANDERLOG_THUMB_SIZE", "360"))
+THUMB_QUALITY = 80
+THUMB_SUFFIX = ".thumb.webp"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+
+
+def thumbnail_path_for(photo_path):
+    return os.path.splitext(photo_path)[0] + THUMB_SUFFIX
+
+
+def is_thumbnail(path):
+    return path.endswith(THUMB_SUFFIX)
+
+
+@traced("image.thumbnail")
+def make_thumbnail(photo_path, size=THUMB_SIZE):
+    """Write the thumbnail for photo_path and return its path (None if the photo is unreadable)."""
+    from PIL import Image, ImageOps
+
+    target = thumbnail_path_for(photo_path)
+    try:
+        with Image.open(photo_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            img.thumbnail((size, size))
+            # write to a temp name first so a half-written file is never served
+            tmp = target + ".tmp"
+            img.save(tmp, "WEBP", quality=THUMB_QUALITY, method=4)
+        os.replace(tmp, target)
+    except (OSError, ValueError):
+        return None
+    return target
+
+
+def schedule_thumbnail(photo_path):
+    """Queue thumbnail generation on the worker pool; returns the Future (or None)."""
+    if not photo_path or is_thumbnail(photo_path) or os.path.exists(thumbnail_path_for(photo_path)):
+        return None  # deduplicated photos already have one
+    return _pool.submit(make_thumbnail, photo_path)
+
+
+def thumbnail_for(photo_path):
+    """Path of an existing thumbnail, queuing one if it is missing. None until it is ready."""
+    if not photo_path or not os.path.exists(photo_path):
+        return None
+    target = thumbnail_path_for(photo_path)
+    if os.path.exists(target):
+        return target
+    schedule_thumbnail(photo_path)
+    return None
+
+
+def remove_thumbnails(photo_path):
+    if not photo_path:
+        return
+    target = thumbnail_path_for(photo_path)
+    if os.path.exists(target):
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+
+
+def backfill(upload_dir, size=THUMB_SIZE, force=False):
+    """Build thumbnails for every photo in upload_dir that does not have one yet."""
+    if not os.path.isdir(upload_dir):
+        return 0
+    jobs = []
+    # photos in the content-addressed store live in subfolders (media/<xx>/)
+    for dirpath, _, names in os.walk(upload_dir):
+        for name in sorted(names):
+            path = os.path.join(dirpath, name)
+            if is_thumbnail(name) or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if force or not os.path.exists(thumbnail_path_for(path)):
+                jobs.append(_pool.submit(make_thumbnail, path, size))
+    return sum(1 for job in jobs if job.result())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build thumbnails for uploaded photos.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("upload_dir", nargs="?", help="defaults to the configured storage backend's uploads folder")
+    parser.add_argument("--force", action="store_true", help="rebuild thumbnails that already exist")
+    args = parser.parse_args()
+
+    upload_dir = args.upload_dir
+    if upload_dir is None:
+        from storage import get_backend
+        upload_dir = get_backend().upload_dir
+    print(f"built {backfill(upload_dir, force=args.force)} thumbnails in {upload_dir}")
@@ -0,0 +1,96 @@
+# validation.py
+# Rules an expense must pass before it is saved.
+#
+# The Add Expense form checks one entry with `validate_expense`; bulk imports
+# run the same rules column-wise over a whole chunk with `validate_frame`.
+import re
+
+import pandas as pd
+
+CATEGORIES = ["Flight", "Hotel", "Food", "Transport", "Sightseeing", "Other"]
+EMOJI_CHARS = "😀😃😄😁😆😅😂🤣😊😇🙂🙃😉😌😍🥰😘😗😙😚😋😛😝😜🤪🤨🧐🤓😎🤩🥳🤗🤔"
+MIN_DESCRIPTION = 3
+
+MSG_CATEGORY = "⚠️ Please select a category."
+MSG_AMOUNT_NUMBER = "⚠️ Amount must be a valid number."
+MSG_AMOUNT_POSITIVE = "⚠️ Amount must be greater than 0."
+MSG_LOCATION = "⚠️ Location cannot be empty."
+MSG_DESCRIPTION = f"⚠️ Description must have at least {MIN_DESCRIPTION} characters."
+MSG_EMOJI = "⚠️ Emoji must contain at least one valid emoji symbol."
+MSG_DATE = "⚠️ Date must be a valid date."
+
+_EMOJI_RE = "[" + re.escape(EMOJI_CHARS) + "]"
+
+
+def validate_expense(category, amount, location, description, emoji=""):
+    """Error messages for a single entry (empty list when it is valid)."""
+    errors = []
+    if not category or category == "Select":
+        errors.append(MSG_CATEGORY)
+    try:
+        if float(amount) <= 0:
+            errors.append(MSG_AMOUNT_POSITIVE)
+    except (TypeError, ValueError):
+        errors.append(MSG_AMOUNT_NUMBER)
+    if not (location or "").strip():
+        errors.append(MSG_LOCATION)
+    if len((description or "").strip()) < MIN_DESCRIPTION:
+        errors.append(MSG_DESCRIPTION)
+    if emoji and not any(ch in emoji for ch in EMOJI_CHARS):
+        errors.append(MSG_EMOJI)
+    return errors
+
+
+def _text(series):
+    return series.fillna('').astype(str).str.strip()
+
+
+def _parse_dates(raw):
+    # fast ISO pass for the common case, then per-element parsing for whatever is left
+    dates = pd.to_datetime(raw, errors='coerce', format='ISO8601')
+    rest = dates.isna() & raw.notna() & (raw.astype(str).str.strip() != '')
+    if rest.any():
+        dates[rest] = pd.to_datetime(raw[rest], errors='coerce', format='mixed')
+    return dates
+
+
+def validate_frame(df):
+    """Check every row of df at once.
+
+    Returns (clean, errors): clean has `date` as YYYY-MM-DD and `amount` as float;
+    errors is a Series of message lists indexed like df, empty for valid rows.
+    """
+    n = len(df)
+    col = lambda name: df[name] if name in df.columns else pd.Series([None] * n, index=df.index)
+
+    category = _text(col('category'))
+    amount = pd.to_numeric(col('amount'), errors='coerce')
+    location = _text(col('location'))
+    description = _text(col('description'))
+    emoji = _text(col('emoji'))
+    dates = _parse_dates(col('date'))
+
+    checks = [
+        ((category == '') | (category == 'Select'), MSG_CATEGORY),
+        (amount.isna(), MSG_AMOUNT_NUMBER),
+        (amount.notna() & (amount <= 0), MSG_AMOUNT_POSITIVE),
+        (location == '', MSG_LOCATION),
+        (description.str.len() < MIN_DESCRIPTION, MSG_DESCRIPTION),
+        ((emoji != '') & ~emoji.str.contains(_EMOJI_RE, regex=True), MSG_EMOJI),
+        (dates.isna(), MSG_DATE),
+    ]
+    errors = pd.Series([[] for _ in range(n)], index=df.index, dtype=object)
+    for mask, message in checks:
+        for idx in mask[mask].index:
+            errors.at[idx] = errors.at[idx] + [message]
+
+    clean = pd.DataFrame({
+        'date': dates.dt.strftime("%Y-%m-%d"),
+        'trip_name': _text(col('trip_name')),
+        'category': category,
+        'amount': amount,
+        'location': location,
+        'description': description,
+        'emoji': emoji,
+    }, index=df.index)
+    return clean, errors
@@ -0,0 +1,33 @@
+# views.py
+# Display columns shared by the Journey Timeline, gallery and maps.
+#
+# Everything here is column-wise pandas; there are no per-row Python loops,
+# so preparing 100k rows costs milliseconds rather than seconds.
+import pandas as pd
+
+
+def _text(series):
+    return series.fillna('').astype(str)
+
+
+def prepare_view_frame(df):
+    """Sorted copy of df with parsed `date`, `month` ("%b %Y"), `title` and `label` columns.
+
+    `title` is "<emoji> <trip or location>" and `label` adds " — ₹<amount>",
+    matching what the timeline and gallery used to build row by row.
+    """
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    # format each distinct month once instead of strftime-ing every row
+    codes, months = pd.factorize(df['date'].dt.to_period('M'))
+    df['month'] = pd.Series(months.strftime("%b %Y"), dtype=object).reindex(codes).to_numpy()
+
+    trip = _text(df['trip_name'])
+    place = trip.where(trip != '', _text(df['location']))
+    df['title'] = _text(df['emoji']) + ' ' + place
+
+    amount = pd.to_numeric(df['amount'], errors='coerce')
+    rounded = amount.round(0).astype('Int64').astype(str).where(amount.notna(), 'nan')
+    df['label'] = df['title'] + ' — ₹' + rounded
+    return df
@@ -0,0 +1,380 @@
+# write_behind.py
+# Journaled write-behind queue for expense mutations.
+#
+# A save is appended to a local journal (JSON lines) and handed back to the
+# page straight away; a background thread later coalesces queued mutations
+# per expense and writes them to the storage backend in batches, retrying
+# with exponential backoff. Whatever is still in the journal when the
+# process starts again is replayed, so an accepted save is never lost.
+#
+# A batch is written step by step - the adds, then each update or delete,
+# then each photo reference given back - and every finished step is
+# journaled before the next one starts. A retry (after an error, or after a
+# restart) skips finished steps, so only a step cut off between the backend
+# call and its journal line can run twice: harmless for updates, deletes and
+# photo releases whose journal line made it, a duplicate row for an add.
+#
+# New expenses get a temporary negative id until the backend assigns the
+# real one; `resolve()` maps a temporary id to its real id afterwards. When
+# the backend cannot report the ids it assigned (the Sheets bulk append),
+# the new rows are found again by their contents. Edits of a row whose id is
+# still unknown are held back rather than dropped, and new ones are refused
+# with UnresolvedIdError.
+import json
+import os
+import threading
+import time
+
+from instrumentation import traced
+
+JOURNAL_PATH = os.environ.get("WANDERLOG_JOURNAL", "mutations.journal")
+FLUSH_DELAY = 0.5       # seconds to wait for more mutations before flushing
+MAX_BATCH = 2000
+MAX_BACKOFF = 60.0
+
+
+def coalesce(entries):
+    """Collapse a list of journal entries into one net operation per expense id.
+
+    Returns a list of dicts (op, id, record, old_photos, seqs) in first-seen
+    order. op is 'add', 'update', 'delete', or 'release' for an add deleted
+    before it was written: nothing goes to the backend, but the photo
+    references it took still have to be given back.
+    """
+    state = {}
+    for entry in entries:
+        eid, op = entry['id'], entry['op']
+        prev = state.get(eid)
+        seqs = (prev or {}).get('seqs', []) + [entry.get('seq')]
+        old_photos = (prev or {}).get('old_photos', []) + ([entry['old_photo']] if entry.get('old_photo') else [])
+        if op == 'add':
+            state[eid] = {'op': 'add', 'id': eid, 'record': entry['record'], 'old_photos': [], 'seqs': seqs}
+        elif op == 'update':
+            net = 'add' if prev and prev['op'] == 'add' else 'update'
+            state[eid] = {'op': net, 'id': eid, 'record': entry['record'], 'old_photos': old_photos, 'seqs': seqs}
+        elif op == 'delete':
+            if prev and prev['op'] == 'add':
+                # never reached the backend; only the photo references it took are left to give back
+                photo = (prev['record'] or {}).get('photo_path')
+                state[eid] = {'op': 'release', 'id': eid, 'record': None,
+                              'old_photos': old_photos + ([photo] if photo else []), 'seqs': seqs}
+            else:
+                state[eid] = {'op': 'delete', 'id': eid, 'record': None, 'old_photos': old_photos, 'seqs': seqs}
+    return list(state.values())
+
+
+def _match_key(record):
+    """Fields a stored row shares with the record it was added from (Sheets does not keep trip_name)."""
+    def text(value):
+        return "" if value is None or value != value else str(value).strip()
+    try:
+        amount = round(float(record.get('amount')), 2)
+    except (TypeError, ValueError):
+        amount = text(record.get('amount'))
+    return (text(record.get('date'))[:10], text(record.get('category')), amount,
+            text(record.get('location')), text(record.get('description')))
+
+
+class UnresolvedIdError(RuntimeError):
+    """The expense was written but the backend never reported its id, so it cannot be edited yet."""
+
+
+class WriteBehindQueue:
+    """Journal + background flusher in front of a storage backend.
+
+    on_flushed(id_map) is called after every successful batch with the
+    {temporary id: real id} assignments it made, or None when the backend did
+    not return some new rows as stored (the caller should then reload).
+    """
+
+    def __init__(self, get_backend, journal_path=JOURNAL_PATH, on_flushed=None, flush_delay=FLUSH_DELAY):
+        self.get_backend = get_backend
+        self.journal_path = journal_path
+        self.on_flushed = on_flushed
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()          # queue state and journal file
+        self._flush_lock = threading.Lock()    # held while a batch is being written
+        self._wake = threading.Event()
+        self._pending = []
+        self._in_flight = []
+        self._held = []         # entries for rows whose real id is not known yet
+        self._id_map = {}
+        self._unresolved = {}   # temporary id -> record of adds written without a known id
+        self._steps = set()     # finished steps of the in-flight batch ("<seq>:<step>")
+        self._seq = 0
+        self._next_temp = -1
+        self._thread = None
+        self._stopped = False
+        self.stats = {"enqueued": 0, "flushed_batches": 0, "written": 0, "coalesced": 0,
+                      "retries": 0, "replayed": 0, "held": 0, "last_error": None}
+        self._replay()
+
+    # ----- journal -----
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return
+        entries, acked, done, batch = [], 0, set(), []
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+                if 'seq' in item:
+                    entries.append(item)
+                    continue
+                if 'ack' in item:
+                    acked = max(acked, item['ack'])   # everything up to this seq (older journals)
+                done.update(item.get('done', ()))
+                self._steps.update(item.get('steps', ()))
+                self._unresolved.update({int(k): v for k, v in item.get('unresolved', {}).items()})
+                for k, v in item.get('ids', {}).items():
+                    self._id_map[int(k)] = v
+                    self._unresolved.pop(int(k), None)
+                if 'batch' in item:
+                    batch = item['batch']
+        for item in entries:
+            self._seq = max(self._seq, item['seq'])
+        for temp in [item['id'] for item in entries] + list(self._unresolved):
+            if isinstance(temp, int) and temp < 0:
+                self._next_temp = min(self._next_temp, temp - 1)
+        outstanding = [item for item in entries if item['seq'] > acked and item['seq'] not in done]
+        # the interrupted batch is retried as it was, so its finished steps line up again
+        in_batch = set(batch)
+        self._in_flight = [item for item in outstanding if item['seq'] in in_batch]
+        self._pending = [item for item in outstanding if item['seq'] not in in_batch]
+        self.stats["replayed"] = len(outstanding)
+        if outstanding:
+            self._ensure_thread()
+            self._wake.set()
+
+    def _append(self, *items):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(item, default=str) + "\n" for item in items))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self):
+        # nothing outstanding: start the journal afresh instead of letting it grow
+        if self._pending or self._in_flight or self._held or not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            if self._unresolved:
+                f.write(json.dumps({'unresolved': {str(k): v for k, v in self._unresolved.items()}},
+                                   default=str) + "\n")
+
+    def _finish(self, net, *steps, **extra):
+        """Journal finished steps of a net (plus ids/unresolved updates) before moving on."""
+        keys = [f"{net['seqs'][-1]}:{step}" for step in steps]
+        with self._lock:
+            self._append(dict(extra, steps=keys))
+            self._steps.update(keys)
+
+    def _is_done(self, net, step):
+        return f"{net['seqs'][-1]}:{step}" in self._steps
+
+    # ----- producers -----
+    def new_temp_id(self):
+        with self._lock:
+            temp = self._next_temp
+            self._next_temp -= 1
+            return temp
+
+    def resolve(self, expense_id):
+        return self._id_map.get(expense_id, expense_id)
+
+    def check_editable(self, expense_id):
+        """Raise UnresolvedIdError if expense_id is a written row whose real id is still unknown."""
+        if expense_id in self._unresolved:
+            raise UnresolvedIdError(f"Expense {expense_id} was saved but its id is not known yet; reload and try again")
+
+    def enqueue(self, op, expense_id, record=None, old_photo=None):
+        self.enqueue_many([(op, expense_id, record, old_photo)])
+
+    def enqueue_many(self, mutations):
+        """Journal several (op, id, record, old_photo) mutations with a single fsync."""
+        for op, expense_id, _, _ in mutations:
+            if op != 'add':
+                self.check_editable(expense_id)
+        with self._lock:
+            items = []
+            for op, expense_id, record, old_photo in mutations:
+                self._seq += 1
+                items.append({'seq': self._seq, 'op': op, 'id': expense_id, 'record': record,
+                              'old_photo': old_photo, 'ts': time.time()})
+            self._append(*items)
+            self._pending.extend(items)
+            self.stats["enqueued"] += len(items)
+        self._ensure_thread()
+        self._wake.set()
+
+    def load(self, loader, apply_change):
+        """loader() with every mutation the backend has not acknowledged replayed on top.
+
+        Waits for a batch that is being written, so a row is never counted
+        both in the backend and in the overlay.
+        """
+        with self._flush_lock:
+            df = loader()
+            with self._lock:
+                outstanding = coalesce(self._held + self._in_flight + self._pending)
+            for net in outstanding:
+                net['id'] = self.resolve(net['id'])
+                if net['op'] == 'add' and self._is_done(net, 'write'):
+                    continue  # already in the backend rows just loaded
+                if net['op'] != 'release':
+                    df = apply_change(df, net)
+        return df
+
+    # ----- consumer -----
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stopped:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.flush_delay)  # let a burst of edits coalesce
+            try:
+                if self.flush():
+                    self._wake.set()
+                backoff = 1.0
+            except Exception as e:
+                self.stats["retries"] += 1
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                self._wake.set()
+
+    def flush(self):
+        """Write one batch to the backend. Returns True if more mutations are waiting."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._in_flight and self._pending:
+                    # held entries ride along with new work, in case their ids can be found now
+                    self._in_flight = self._held + self._pending[:MAX_BATCH]
+                    self._pending = self._pending[MAX_BATCH:]
+                    self._held = []
+                    self._append({'batch': [item['seq'] for item in self._in_flight]})
+                batch = list(self._in_flight)
+            if not batch:
+                return False
+            nets = coalesce(batch)
+            known = dict(self._id_map)
+            # an earlier batch may have given a temporary id its real id
+            for net in nets:
+                net['id'] = self.resolve(net['id'])
+            lost = self._write(nets)
+            held = [net for net in nets if net['op'] in ('update', 'delete') and net['id'] is not None and net['id'] < 0]
+            held_seqs = {seq for net in held for seq in net['seqs']}
+            with self._lock:
+                done = [item['seq'] for item in batch if item['seq'] not in held_seqs]
+                self._append({'done': done})
+                self._steps = {key for key in self._steps if int(key.split(":")[0]) in held_seqs}
+                self._held = [item for item in batch if item['seq'] in held_seqs]
+                self._in_flight = []
+                self.stats["flushed_batches"] += 1
+                self.stats["written"] += len(nets) - len(held)
+                self.stats["coalesced"] += len(batch) - len(nets)
+                self.stats["held"] = len(self._held)
+                self.stats["last_error"] = None
+                self._compact()
+                more = bool(self._pending)
+            id_map = {k: v for k, v in self._id_map.items() if known.get(k) != v}
+        if self.on_flushed:
+            self.on_flushed(None if lost else id_map)
+        return more
+
+    @traced("write_behind.write_batch")
+    def _write(self, nets):
+        """Apply nets step by step, journaling each finished step. Returns True if the backend did not return new rows."""
+        backend = self.get_backend()
+        lost = False
+        adds = [net for net in nets if net['op'] == 'add' and not self._is_done(net, 'write')]
+        if adds:
+            stored = backend.add_many([net['record'] for net in adds])
+            stored = stored if stored is not None else [None] * len(adds)
+            ids = {net['id']: s['id'] for net, s in zip(adds, stored) if s is not None and s.get('id') is not None}
+            missing = {net['id']: net['record'] for net in adds if net['id'] not in ids}
+            keys = [f"{net['seqs'][-1]}:write" for net in adds]
+            with self._lock:
+                # one journal line for the whole insert: those rows are in, whatever fails next
+                self._append({'steps': keys, 'ids': {str(k): v for k, v in ids.items()},
+                              'unresolved': {str(k): v for k, v in missing.items()}})
+                self._steps.update(keys)
+                self._id_map.update(ids)
+                self._unresolved.update(missing)
+            # whatever the ids turn out to be, the cached copies of these rows may differ from what was stored
+            lost = bool(missing)
+        if self._unresolved and (adds or any(net['id'] in self._unresolved for net in nets)):
+            self._identify(backend)
+            for net in nets:
+                net['id'] = self.resolve(net['id'])
+        for net in nets:
+            if net['op'] in ('update', 'delete') and net['id'] is not None and net['id'] < 0:
+                continue  # held: written once its add has a real id, photos included
+            if net['op'] in ('update', 'delete') and not self._is_done(net, 'write'):
+                if net['op'] == 'update':
+                    backend.update(net['id'], net['record'], keep_photo=net['record'].get('photo_path'))
+                else:
+                    backend.delete(net['id'])
+                self._finish(net, 'write')
+            for i, old in enumerate(net['old_photos']):
+                # each replaced photo holds one reference, even when the same photo was re-attached
+                if old and not self._is_done(net, f"photo{i}"):
+                    backend.remove_photo(old)
+                    self._finish(net, f"photo{i}")
+        return lost
+
+    def _identify(self, backend):
+        """Find rows the backend stored without reporting their ids, newest matching row first."""
+        try:
+            df = backend.load_df()
+        except Exception as e:
+            self.stats["last_error"] = f"{type(e).__name__}: {e}"
+            return
+        with self._lock:
+            claimed = set(self._id_map.values())
+            candidates = {}
+            for row in sorted(df.to_dict('records'), key=lambda r: -_as_int(r.get('id'))):
+                if _as_int(row.get('id')) > 0 and _as_int(row.get('id')) not in claimed:
+                    candidates.setdefault(_match_key(row), []).append(_as_int(row.get('id')))
+            found = {}
+            # the most recent add gets the highest matching id
+            for temp in sorted(self._unresolved):
+                ids = candidates.get(_match_key(self._unresolved[temp]))
+                if ids:
+                    found[temp] = ids.pop(0)
+            if not found:
+                return
+            for temp in found:
+                self._unresolved.pop(temp)
+            self._id_map.update(found)
+            self._append({'ids': {str(k): v for k, v in found.items()}})
+
+    def wait_until_idle(self, timeout=10.0):
+        """Block until everything queued so far is written (or timeout). Used at shutdown and in scripts."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending and not self._in_flight:
+                    return True
+            time.sleep(0.05)
+        return False
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._pending) + len(self._in_flight)
+            stats["unresolved"] = len(self._unresolved)
+            return stats
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0